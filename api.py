@@ -0,0 +1,79 @@
+"""Library API of the converter, which works in memory and does not need command line arguments or files.
+
+Example:
+    from api import convert
+    from options import ConversionOptions
+
+    with open('lab.unl', 'rb') as f:
+        result = convert(f, ConversionOptions(console_start_port=6000))
+    result.project['name'], sorted(result.configs)
+"""
+import json
+import os
+from typing import Dict, NamedTuple
+
+from options import ConversionOptions
+from topology import Topology
+
+
+class ConversionResult(NamedTuple):
+    """GNS3 project converted from an EVE-NG lab.
+
+    Attributes:
+        name (str): lab name, which is also the name of the project folder
+        project (dict): content of the .gns3 file
+        configs (dict): config file path relative to the project folder to config bytes mapping,
+            empty if the files were passed to a sink
+    """
+    name: str
+    project: dict
+    configs: Dict[str, bytes]
+
+    @property
+    def project_filename(self):
+        return f'{self.name}.gns3'
+
+    @property
+    def project_json(self):
+        """Content of the .gns3 file, exactly as it is written by the command line script"""
+        return json.dumps(self.project, indent=4, sort_keys=True)
+
+
+def convert(source, options=None, sink=None):
+    """
+    Converts an EVE-NG lab into a GNS3 project without touching disk
+
+    It is safe to call the function concurrently from several threads, even with the same options object.
+    For that, the conversion always runs in the calling process: options.workers is ignored, because forking
+    worker processes from a process with other running threads is not safe.
+
+    Args:
+        source: bytes, string or a binary file object with the content of the *.unl file
+        options: ConversionOptions object, defaults are used if not specified
+        sink: callable sink(relative_path, content), if specified it is called for the .gns3 file
+            and every config file instead of collecting configs in the result,
+            relative_path is relative to the project folder and content is bytes
+
+    Returns:
+        ConversionResult object
+    """
+    if hasattr(source, 'read'):
+        source = source.read()
+    if options is None:
+        options = ConversionOptions()
+    # the config store and project updates work on files in the destination folder
+    topology = Topology(source, options._replace(config_store_dir=None, update=False, workers=1))
+
+    project = topology.build_gns_topology_dict()
+    configs = {}
+    for node in topology.nodes:
+        if node.config:
+            configs[os.path.join('configs', node.config_filename)] = node.config
+    result = ConversionResult(name=topology.name, project=project, configs=configs)
+
+    if sink is not None:
+        sink(result.project_filename, result.project_json.encode())
+        for relative_path, content in configs.items():
+            sink(relative_path, content)
+        result = result._replace(configs={})
+    return result
@@ -0,0 +1,471 @@
+import glob
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import time
+import xml.sax
+
+from catalog import CATALOG_FILENAME, Catalog
+from console_ports import (CONSOLE_PORT_MAP_FILENAME, create_console_port_allocator, get_lab_key,
+                           merge_console_port_maps)
+from emitters import get_emitter
+from gns3_api import Gns3Client
+from journal import Journal
+from metrics import BatchMetrics
+from options import ConversionOptions
+from scan import LabStats, scan_lab
+from sharding import assign_shards, shard_suffix
+from topology import Topology
+
+
+JOURNAL_FILENAME = 'convert-journal{suffix}.jsonl'
+SUMMARY_FILENAME = 'summary{suffix}.json'
+
+
+def convert_topology(src_topology_file, args, dst_dir, push_client=None, console_ports=None, lab_key=None):
+    """
+    Parses the source topology once and writes it in all requested output formats
+
+    Args:
+        src_topology_file: string or bytes, content of the source *.unl file
+        args: parsed command line arguments
+        dst_dir: string, destination directory
+        push_client: Gns3Client object, if specified the project is also created on GNS3 server
+        console_ports: ConsolePortAllocator object, if specified console ports are allocated from it
+        lab_key: string, key of the lab in the console port allocator
+
+    Returns:
+        Topology object
+        list of paths to the written files
+    """
+    topology = Topology(src_topology_file, ConversionOptions.from_args(args), dst_dir)
+    if topology.placement is not None:
+        print(f'Placed {topology.name} on {topology.placement.report()}')
+    if console_ports is not None:
+        topology.set_console_ports(console_ports.assign(lab_key, topology.id_to_node))
+    paths = []
+    for output_format in args.output_format:
+        paths.extend(get_emitter(output_format).write(topology, dst_dir))
+    # formats may share files, e.g. configs of gns3 and containerlab outputs
+    paths = list(dict.fromkeys(paths))
+    if push_client is not None:
+        timings = push_client.push_topology(topology)
+        report = ', '.join(f'{stage}: {value}' for stage, value in timings.items())
+        print(f'Successfully pushed {topology.name} to {push_client.url} ({report})')
+    return topology, paths
+
+
+def create_push_client(args):
+    if not args.push:
+        return None
+    return Gns3Client(args.push, concurrency=args.push_concurrency, retries=args.push_retries)
+
+
+def find_topology_files(src_dir):
+    """
+    Recursively finds *.unl files in the source directory
+
+    Args:
+        src_dir: string, source directory
+
+    Returns:
+        generator of (path to *.unl file, directory relative to src_dir) tuples
+    """
+    for dir_name, _, files in os.walk(src_dir):
+        relative_dir = os.path.relpath(dir_name, src_dir)
+        for filename in files:
+            if filename.endswith(".unl"):
+                yield os.path.join(dir_name, filename), relative_dir
+
+
+def hash_files(paths):
+    """
+    Calculates a single sha256 hash over the content of all files
+
+    Args:
+        paths: iterable of file paths
+
+    Returns:
+        string, hex digest
+    """
+    sha256 = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            sha256.update(f.read())
+    return sha256.hexdigest()
+
+
+def get_file_size(path):
+    """Size of the file, 0 if it can't be read, the file then fails in convert_file and is recorded there"""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def describe_error(exception):
+    """
+    Describes an exception for the journal and metrics
+
+    Returns:
+        tuple (exception type name, error string)
+    """
+    return type(exception).__name__, f'{type(exception).__name__}: {exception}'
+
+
+def convert_source(source, args, dst_dir, push_client=None, console_ports=None, lab_key=None):
+    """
+    Converts one source file and describes the result
+
+    Args:
+        source: bytes, content of the source *.unl file
+        args: parsed command line arguments
+        dst_dir: string, destination directory
+        push_client: Gns3Client object or None
+        console_ports: ConsolePortAllocator object or None
+        lab_key: string, key of the lab in the console port allocator
+
+    Returns:
+        dictionary with the conversion result
+    """
+    topology, paths = convert_topology(source, args, dst_dir, push_client, console_ports, lab_key)
+    return {
+        'output_hash': hash_files(paths),
+        'nodes': len(topology.id_to_node),
+        'links': len(topology.links),
+        'config_store_hits': topology.config_store.hits if topology.config_store is not None else 0,
+        'console_ports': {lab_key: console_ports.labs[lab_key]} if console_ports is not None else {},
+    }
+
+
+def _convert_in_child(connection, source, args, dst_dir, push_client, console_ports, lab_key):
+    try:
+        connection.send((Journal.STATUS_OK, convert_source(source, args, dst_dir, push_client, console_ports, lab_key),
+                         None, None))
+    except Exception as e:
+        connection.send((Journal.STATUS_FAILED, None) + describe_error(e))
+    finally:
+        connection.close()
+
+
+def convert_source_with_timeout(source, args, dst_dir, timeout, push_client=None, console_ports=None, lab_key=None):
+    """
+    Converts one source file in a child process, which is terminated if it runs longer than timeout
+
+    Console ports allocated in the child are returned in the result and have to be taken over
+    by the allocator of the parent with ConsolePortAllocator.update.
+
+    Args:
+        source: bytes, content of the source *.unl file
+        args: parsed command line arguments
+        dst_dir: string, destination directory
+        timeout: float, number of seconds
+        push_client: Gns3Client object or None
+        console_ports: ConsolePortAllocator object or None
+        lab_key: string, key of the lab in the console port allocator
+
+    Returns:
+        tuple (status, result dictionary or None, error type or None, error string or None)
+    """
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+    else:
+        context = multiprocessing.get_context()
+    parent_connection, child_connection = context.Pipe(duplex=False)
+    process = context.Process(target=_convert_in_child,
+                              args=(child_connection, source, args, dst_dir, push_client, console_ports, lab_key))
+    process.start()
+    child_connection.close()
+
+    try:
+        if parent_connection.poll(timeout):
+            try:
+                return parent_connection.recv()
+            except EOFError:
+                process.join()
+                return (Journal.STATUS_FAILED, None, 'ProcessExit',
+                        f'conversion process exited with code {process.exitcode}')
+        process.terminate()
+        return Journal.STATUS_TIMEOUT, None, 'Timeout', f'conversion took longer than {timeout} seconds'
+    finally:
+        process.join()
+        parent_connection.close()
+
+
+class BatchRunner(object):
+    """Converts all *.unl files in the source directory.
+
+    A failure of one file does not stop the run: it is recorded in the journal and the next file is converted.
+    With args.resume, files whose last journal entry is successful and whose content has not changed are skipped.
+
+    With args.shard (K, N), only the K-th of N deterministic slices of the files is converted, so that
+    several hosts can share one destination directory. Journal and summary file names then get a shard suffix.
+
+    Attributes:
+        args: parsed command line arguments
+        journal (Journal): journal of this run
+        completed (dict): source path to source hash mapping of already converted files
+        failures (list): journal entries of failed files
+        metrics (BatchMetrics): throughput and latency metrics of this run
+        catalog (Catalog): queryable index of all converted labs
+    """
+    def __init__(self, args):
+        self.args = args
+        self.suffix = shard_suffix(args.shard)
+        self.journal = Journal(args.journal or os.path.join(args.dst_dir, JOURNAL_FILENAME.format(suffix=self.suffix)))
+        self.completed = self.journal.completed() if args.resume else {}
+        self.converted = 0
+        self.failed = 0
+        self.skipped = 0
+        self.source_bytes = 0
+        self.failures = []
+        self.metrics = BatchMetrics(events_path=args.metrics_jsonl)
+        self.push_client = create_push_client(args)
+        self.console_ports, self.console_port_map_path = create_console_port_allocator(args, args.shard, self.suffix)
+        self.catalog = Catalog(args.catalog or os.path.join(args.dst_dir, CATALOG_FILENAME.format(suffix=self.suffix)))
+
+    def select_files(self):
+        """
+        Finds the files which should be converted by this run, sorted by their path
+
+        Returns:
+            list of (path to *.unl file, directory relative to src_dir) tuples
+
+        Raises:
+            FileNotFoundError if there are no *.unl files in the source directory
+        """
+        files = sorted(find_topology_files(self.args.src_dir))
+        if not files:
+            raise FileNotFoundError("No *.unl files have been found.")
+        if self.args.shard is None:
+            return files
+
+        shard_number, shard_count = self.args.shard
+        path_to_shard = assign_shards(
+            ((os.path.relpath(full_path, self.args.src_dir), get_file_size(full_path)) for full_path, _ in files),
+            shard_count
+        )
+        return [(full_path, relative_dir) for full_path, relative_dir in files
+                if path_to_shard[os.path.relpath(full_path, self.args.src_dir)] == shard_number]
+
+    def run(self):
+        """
+        Converts all found files
+
+        Returns:
+            boolean - True if no file has failed
+
+        Raises:
+            FileNotFoundError if there are no *.unl files in the source directory
+        """
+        files = self.select_files()
+        start_time = time.perf_counter()
+        try:
+            for full_path, relative_dir in files:
+                self.convert_file(full_path, relative_dir)
+        finally:
+            self.journal.close()
+            self.catalog.close()
+            if self.console_ports is not None:
+                self.console_ports.save(self.console_port_map_path)
+            if self.push_client is not None:
+                self.push_client.close()
+            self.metrics.finish(time.perf_counter() - start_time)
+            if self.args.metrics_prom:
+                self.metrics.write_prometheus(self.args.metrics_prom)
+
+        summary = self.build_summary(files=len(files), seconds=time.perf_counter() - start_time)
+        write_summary(summary, os.path.join(self.args.dst_dir, SUMMARY_FILENAME.format(suffix=self.suffix)))
+        print(f'Converted: {self.converted}, failed: {self.failed}, skipped: {self.skipped}. '
+              f'Journal: {self.journal.path}')
+        return not self.failed
+
+    def build_summary(self, files, seconds):
+        return {
+            'shards': [list(self.args.shard)] if self.args.shard else [],
+            'files': files,
+            'converted': self.converted,
+            'failed': self.failed,
+            'skipped': self.skipped,
+            'source_bytes': self.source_bytes,
+            'seconds': round(seconds, 6),
+            'failures': [{'path': entry['path'], 'status': entry['status'], 'error': entry['error']}
+                         for entry in self.failures],
+        }
+
+    def convert_file(self, full_path, relative_dir):
+        """
+        Converts a single file and records the outcome in the journal
+
+        Args:
+            full_path: string, path to the source file
+            relative_dir: string, directory of the file relative to the source directory
+
+        Returns:
+            dictionary, the journal entry or None if the file was skipped
+        """
+        path = os.path.relpath(full_path, self.args.src_dir)
+        try:
+            with open(full_path, 'rb') as f:
+                source = f.read()
+        except OSError as e:
+            # e.g. no permission or a broken symlink, the rest of the batch goes on
+            return self.record_unreadable_file(full_path, path, e)
+        source_hash = hashlib.sha256(source).hexdigest()
+        self.source_bytes += len(source)
+
+        if self.completed.get(path) == source_hash:
+            print(f'Skipping {full_path}, it has already been converted')
+            self.skipped += 1
+            self.metrics.record_cache_hit('journal')
+            if not self.catalog.contains(path, source_hash):
+                self.update_catalog(path, source, source_hash, Journal.STATUS_OK, relative_dir)
+            return None
+
+        print(f'Parsing {full_path}')
+        dst_dir = os.path.join(self.args.dst_dir, relative_dir)
+        start_time = time.perf_counter()
+        if self.args.timeout:
+            status, result, error_type, error = convert_source_with_timeout(
+                source, self.args, dst_dir, self.args.timeout, self.push_client, self.console_ports,
+                get_lab_key(full_path)
+            )
+            if result and self.console_ports is not None:
+                self.console_ports.update(result['console_ports'])
+        else:
+            try:
+                status, result = Journal.STATUS_OK, convert_source(source, self.args, dst_dir, self.push_client,
+                                                                   self.console_ports, get_lab_key(full_path))
+                error_type = error = None
+            except Exception as e:
+                status, result = Journal.STATUS_FAILED, None
+                error_type, error = describe_error(e)
+        seconds = time.perf_counter() - start_time
+
+        entry = self.journal.record(path, status, seconds,
+                                    source_hash=source_hash,
+                                    output_hash=result['output_hash'] if result else None,
+                                    error=error,
+                                    error_type=error_type)
+        self.metrics.observe_file(path, status, seconds,
+                                  source_bytes=len(source),
+                                  nodes=result['nodes'] if result else 0,
+                                  links=result['links'] if result else 0,
+                                  error_type=error_type)
+        self.update_catalog(path, source, source_hash, status, relative_dir)
+        if result and result['config_store_hits']:
+            self.metrics.record_cache_hit('config_store', result['config_store_hits'])
+        if status == Journal.STATUS_OK:
+            self.converted += 1
+        else:
+            self.failed += 1
+            self.failures.append(entry)
+            print(f'Failed to convert {full_path}: {error}')
+        return entry
+
+    def record_unreadable_file(self, full_path, path, exception):
+        """
+        Records a source file which can't be read as failed, it has no content to be hashed or cataloged
+
+        Args:
+            full_path: string, path to the source file
+            path: string, path to the source file relative to the source directory
+            exception: OSError raised while reading the file
+
+        Returns:
+            dictionary, the journal entry
+        """
+        error_type, error = describe_error(exception)
+        entry = self.journal.record(path, Journal.STATUS_FAILED, 0, error=error, error_type=error_type)
+        self.metrics.observe_file(path, Journal.STATUS_FAILED, 0, error_type=error_type)
+        self.failed += 1
+        self.failures.append(entry)
+        print(f'Failed to convert {full_path}: {error}')
+        return entry
+
+    def update_catalog(self, path, source, source_hash, status, relative_dir):
+        """
+        Records the source file in the catalog, its stats are collected with the streaming scanner
+
+        Args:
+            path: string, path to the source file relative to the source directory
+            source: bytes, content of the source file
+            source_hash: string, sha256 of the source file
+            status: string, journal status of the conversion
+            relative_dir: string, directory of the file relative to the source directory
+
+        Returns:
+            None
+        """
+        try:
+            stats = scan_lab(io.BytesIO(source), path)
+        except xml.sax.SAXException:
+            stats = LabStats(path=path)
+        output_path = None
+        if status == Journal.STATUS_OK and stats.name is not None:
+            output_path = os.path.normpath(os.path.join(self.args.dst_dir, relative_dir, stats.name))
+        self.catalog.record(path, source_hash, stats, status, output_path)
+
+
+def write_summary(summary, path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(json.dumps(summary, indent=4, sort_keys=True))
+
+
+def merge_shard_summaries(dst_dir):
+    """
+    Combines summaries written by sharded runs into DST_DIR/summary.json,
+    their catalogs into DST_DIR/catalog.sqlite3 and console port maps into DST_DIR/console-ports.json
+
+    Args:
+        dst_dir: string, destination directory shared by all shards
+
+    Returns:
+        dictionary, the merged summary; 'missing_shards' lists shards without a summary
+
+    Raises:
+        FileNotFoundError if there are no shard summaries in dst_dir
+    """
+    paths = sorted(glob.glob(os.path.join(dst_dir, SUMMARY_FILENAME.format(suffix='.shard-*-of-*'))))
+    if not paths:
+        raise FileNotFoundError(f'No shard summaries have been found in {dst_dir}')
+
+    merged = {'shards': [], 'files': 0, 'converted': 0, 'failed': 0, 'skipped': 0,
+              'source_bytes': 0, 'seconds': 0, 'failures': []}
+    for path in paths:
+        with open(path) as f:
+            summary = json.load(f)
+        merged['shards'].extend(summary['shards'])
+        for key in ('files', 'converted', 'failed', 'skipped', 'source_bytes'):
+            merged[key] += summary[key]
+        # shards run in parallel, so the wall clock time of the batch is the time of the slowest shard
+        merged['seconds'] = max(merged['seconds'], summary['seconds'])
+        merged['failures'].extend(summary['failures'])
+
+    shard_counts = {shard_count for _, shard_count in merged['shards']}
+    present = {tuple(shard) for shard in merged['shards']}
+    merged['missing_shards'] = sorted([shard_number, shard_count]
+                                      for shard_count in shard_counts
+                                      for shard_number in range(1, shard_count + 1)
+                                      if (shard_number, shard_count) not in present)
+    merged['shards'].sort()
+
+    write_summary(merged, os.path.join(dst_dir, SUMMARY_FILENAME.format(suffix='')))
+
+    catalog = Catalog(os.path.join(dst_dir, CATALOG_FILENAME.format(suffix='')))
+    try:
+        for path in sorted(glob.glob(os.path.join(dst_dir, CATALOG_FILENAME.format(suffix='.shard-*-of-*')))):
+            catalog.merge(path)
+    finally:
+        catalog.close()
+
+    merge_console_port_maps(
+        sorted(glob.glob(os.path.join(dst_dir, CONSOLE_PORT_MAP_FILENAME.format(suffix='.shard-*-of-*')))),
+        os.path.join(dst_dir, CONSOLE_PORT_MAP_FILENAME.format(suffix=''))
+    )
+    return merged
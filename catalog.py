@@ -0,0 +1,159 @@
+import datetime
+import os
+import sqlite3
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS labs (
+    source_path TEXT PRIMARY KEY,
+    source_hash TEXT NOT NULL,
+    name TEXT,
+    status TEXT NOT NULL,
+    nodes INTEGER NOT NULL,
+    links INTEGER NOT NULL,
+    ram INTEGER NOT NULL,
+    cpus INTEGER NOT NULL,
+    output_path TEXT,
+    updated_at TEXT NOT NULL
+);
+-- node_types, templates and images of every lab: kind is one of INVENTORY_KINDS
+CREATE TABLE IF NOT EXISTS lab_inventory (
+    source_path TEXT NOT NULL REFERENCES labs (source_path) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    value TEXT,
+    nodes INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS labs_name ON labs (name);
+CREATE INDEX IF NOT EXISTS labs_nodes ON labs (nodes);
+CREATE INDEX IF NOT EXISTS lab_inventory_source_path ON lab_inventory (source_path);
+CREATE INDEX IF NOT EXISTS lab_inventory_kind_value ON lab_inventory (kind, value);
+"""
+
+CATALOG_FILENAME = 'catalog{suffix}.sqlite3'
+INVENTORY_KINDS = ('node_types', 'templates', 'images')
+INVENTORY_CONDITION = ('labs.source_path IN '
+                       '(SELECT source_path FROM lab_inventory WHERE kind = ? AND value {operator} ?)')
+
+
+class Catalog(object):
+    """SQLite catalog of converted labs, which can be queried without reading any *.unl file.
+
+    Every lab is stored with its source path and hash, status of the last conversion, node/link counts,
+    total RAM/CPUs, node types/templates and images.
+
+    Attributes:
+        path (str): path to the SQLite database
+    """
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        self.connection.executescript(SCHEMA)
+
+    def record(self, source_path, source_hash, stats, status, output_path=None):
+        """
+        Inserts or replaces the lab in the catalog
+
+        Args:
+            source_path: string, path to the source file relative to the source directory
+            source_hash: string, sha256 of the source file
+            stats: scan.LabStats object of the source file
+            status: string, journal status of the conversion
+            output_path: string, directory of the converted project
+
+        Returns:
+            None
+        """
+        with self.connection:
+            self.connection.execute('DELETE FROM labs WHERE source_path = ?', (source_path,))
+            self.connection.execute(
+                'INSERT INTO labs (source_path, source_hash, name, status, nodes, links, ram, cpus, output_path, '
+                'updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (source_path, source_hash, stats.name, status, stats.nodes, stats.links, stats.ram, stats.cpus,
+                 output_path, datetime.datetime.now(datetime.timezone.utc).isoformat())
+            )
+            self.connection.executemany(
+                'INSERT INTO lab_inventory (source_path, kind, value, nodes) VALUES (?, ?, ?, ?)',
+                [(source_path, kind, value, count)
+                 for kind in INVENTORY_KINDS for value, count in getattr(stats, kind).items()]
+            )
+
+    def contains(self, source_path, source_hash):
+        """Checks if the catalog has an entry of the source file with the same content"""
+        row = self.connection.execute('SELECT 1 FROM labs WHERE source_path = ? AND source_hash = ?',
+                                      (source_path, source_hash)).fetchone()
+        return row is not None
+
+    def query(self, name=None, image=None, node_type=None, template=None, min_nodes=None, max_nodes=None,
+              status=None):
+        """
+        Finds labs matching all given conditions, name and image are SQL LIKE patterns
+
+        Returns:
+            list of dictionaries, one per lab, sorted by source path
+        """
+        conditions = []
+        params = []
+        if name is not None:
+            conditions.append('labs.name LIKE ?')
+            params.append(name)
+        if image is not None:
+            conditions.append(INVENTORY_CONDITION.format(operator='LIKE'))
+            params.extend(('images', image))
+        if node_type is not None:
+            conditions.append(INVENTORY_CONDITION.format(operator='='))
+            params.extend(('node_types', node_type))
+        if template is not None:
+            conditions.append(INVENTORY_CONDITION.format(operator='='))
+            params.extend(('templates', template))
+        if min_nodes is not None:
+            conditions.append('labs.nodes >= ?')
+            params.append(min_nodes)
+        if max_nodes is not None:
+            conditions.append('labs.nodes <= ?')
+            params.append(max_nodes)
+        if status is not None:
+            conditions.append('labs.status = ?')
+            params.append(status)
+
+        sql = 'SELECT * FROM labs'
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY labs.source_path'
+        return self.execute(sql, params)
+
+    def execute(self, sql, params=()):
+        """
+        Runs an arbitrary SQL statement against the catalog
+
+        Returns:
+            list of dictionaries, one per row
+        """
+        return [dict(row) for row in self.connection.execute(sql, params)]
+
+    def merge(self, other_path):
+        """
+        Copies all labs from another catalog, e.g. a catalog of one shard, replacing existing entries
+
+        Args:
+            other_path: string, path to the other catalog
+
+        Returns:
+            None
+        """
+        with self.connection:
+            self.connection.execute('ATTACH DATABASE ? AS other', (other_path,))
+        try:
+            with self.connection:
+                self.connection.execute('DELETE FROM labs WHERE source_path IN (SELECT source_path FROM other.labs)')
+                self.connection.execute('INSERT INTO labs SELECT * FROM other.labs')
+                self.connection.execute('INSERT INTO lab_inventory SELECT * FROM other.lab_inventory')
+        finally:
+            self.connection.execute('DETACH DATABASE other')
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,101 @@
+import hashlib
+import os
+import shutil
+
+
+CONFIG_STORE_DIRNAME = '.config-store'
+
+
+def remove_file(path):
+    """Removes the file if it exists, so that the next write creates a new file instead of changing a hardlinked one"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def has_content(path, content):
+    """
+    Checks if the file exists and contains exactly the content, the size is compared before reading the file
+
+    Args:
+        path: string, path to the file
+        content: bytes
+
+    Returns:
+        boolean
+    """
+    try:
+        if os.stat(path).st_size != len(content):
+            return False
+        with open(path, 'rb') as f:
+            return f.read() == content
+    except FileNotFoundError:
+        return False
+
+
+class ConfigStore(object):
+    """Content-addressed store of startup-configs shared by all projects in the destination folder.
+
+    Every distinct config is written once to ROOT/ab/abcdef..., where the name is the sha256 of the content,
+    and is hardlinked into the configs directory of each project. If a hardlink is not possible,
+    e.g. the project is on another filesystem, the stored file is copied instead.
+
+    Attributes:
+        root (str): directory of the store
+        hits (int): number of configs which were already in the store
+        links (int): number of configs which were hardlinked into projects
+        copies (int): number of configs which were copied into projects
+    """
+    def __init__(self, root):
+        self.root = root
+        self.hits = 0
+        self.links = 0
+        self.copies = 0
+
+    def get_path(self, content):
+        digest = hashlib.sha256(content).hexdigest()
+        return os.path.join(self.root, digest[:2], digest)
+
+    def put(self, content):
+        """
+        Adds the content to the store unless it is already there
+
+        Args:
+            content: bytes
+
+        Returns:
+            string, path to the stored file
+        """
+        path = self.get_path(content)
+        if os.path.exists(path):
+            self.hits += 1
+            return path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # concurrent writers (e.g. shards sharing DST_DIR) never see a partially written file
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(content)
+        os.replace(temp_path, path)
+        return path
+
+    def write(self, content, path):
+        """
+        Places the content at path as a hardlink to the stored file or as its copy
+
+        Args:
+            content: bytes
+            path: string, destination path
+
+        Returns:
+            string, path
+        """
+        stored_path = self.put(content)
+        remove_file(path)
+        try:
+            os.link(stored_path, path)
+            self.links += 1
+        except OSError:
+            shutil.copyfile(stored_path, path)
+            self.copies += 1
+        return path
@@ -0,0 +1,302 @@
+import argparse
+import json
+import os
+
+import exceptions
+
+
+CONSOLE_PORT_MAP_FILENAME = 'console-ports{suffix}.json'
+MAX_PORT = 65535
+
+
+def parse_port_range(value):
+    """
+    Parses a port or a port range, it is used as argparse type
+
+    Args:
+        value: string in the format PORT or FIRST-LAST
+
+    Returns:
+        tuple (first port, last port)
+
+    Raises:
+        argparse.ArgumentTypeError if the value is not valid
+    """
+    try:
+        first_port, _, last_port = value.partition('-')
+        port_range = int(first_port), int(last_port or first_port)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'port range must be in the format PORT or FIRST-LAST, got {value}')
+    if not 1 <= port_range[0] <= port_range[1] <= MAX_PORT:
+        raise argparse.ArgumentTypeError(f'port range must be within 1-{MAX_PORT}, got {value}')
+    return port_range
+
+
+def get_lab_key(path):
+    """
+    Key of the lab in the allocator, the same for --src_topology_file and --src_dir runs
+
+    Args:
+        path: string, path to the source *.unl file
+
+    Returns:
+        string, absolute path of the file with symlinks resolved
+    """
+    return os.path.realpath(path)
+
+
+def split_port_range(start_port, end_port, shard):
+    """
+    Gives every shard its own slice of the port range, so shards never hand out the same port
+
+    Args:
+        start_port: int, first port of the whole range
+        end_port: int, last port of the whole range
+        shard: tuple (K, N) or None
+
+    Returns:
+        tuple (first port, last port) of the shard
+    """
+    if shard is None:
+        return start_port, end_port
+    shard_number, shard_count = shard
+    size = (end_port - start_port + 1) // shard_count
+    first_port = start_port + (shard_number - 1) * size
+    return first_port, first_port + size - 1
+
+
+class ConsolePortAllocator(object):
+    """Hands out console ports which are unique across all labs of a batch.
+
+    Used ports are kept in a bitmap with one bit per port of the range, reserved ranges are marked as used upfront.
+    Free ports are found from a cursor which only moves forward, except when a port behind it is released,
+    so a batch allocating n ports does O(n + range size) work in total, i.e. O(1) per port.
+
+    Allocations are keyed by the lab (e.g. path of the source file) and EVE node ID and can be saved to
+    and loaded from a JSON map, so a node keeps its port in later incremental runs.
+
+    Attributes:
+        start_port (int): first port of the range
+        end_port (int): last port of the range
+        labs (dict): lab key to {EVE node ID: port} mapping
+    """
+    def __init__(self, start_port, end_port, reserved=()):
+        if end_port < start_port:
+            raise ValueError(f'console port range {start_port}-{end_port} is empty')
+        self.start_port = start_port
+        self.end_port = end_port
+        self.bitmap = bytearray((end_port - start_port) // 8 + 1)
+        self.cursor = start_port
+        self.labs = {}
+        self.reserved = set()
+        for first_port, last_port in reserved:
+            for port in range(max(first_port, start_port), min(last_port, end_port) + 1):
+                self._set(port)
+                self.reserved.add(port)
+
+    def _set(self, port):
+        offset = port - self.start_port
+        self.bitmap[offset >> 3] |= 1 << (offset & 7)
+
+    def _clear(self, port):
+        offset = port - self.start_port
+        self.bitmap[offset >> 3] &= ~(1 << (offset & 7))
+        self.cursor = min(self.cursor, port)
+
+    def is_used(self, port):
+        offset = port - self.start_port
+        return bool(self.bitmap[offset >> 3] & (1 << (offset & 7)))
+
+    def is_available(self, port):
+        return self.start_port <= port <= self.end_port and not self.is_used(port)
+
+    def allocate_port(self):
+        """
+        Finds the first free port at or after the cursor and marks it as used
+
+        Returns:
+            int, the port
+
+        Raises:
+            exceptions.ConsolePortsExhausted if there is no free port
+        """
+        while self.cursor <= self.end_port:
+            offset = self.cursor - self.start_port
+            if self.bitmap[offset >> 3] == 0xff and offset & 7 == 0:
+                # the whole byte is used, skip 8 ports at once
+                self.cursor += 8
+                continue
+            port = self.cursor
+            self.cursor += 1
+            if not self.is_used(port):
+                self._set(port)
+                return port
+        raise exceptions.ConsolePortsExhausted(
+            f'all console ports between {self.start_port} and {self.end_port} are used'
+        )
+
+    def assign(self, lab_key, node_ids):
+        """
+        Allocates console ports to all nodes of the lab, keeping ports of the previous allocation where possible
+
+        Ports of nodes which are no longer in the lab are released.
+        The allocation is all or nothing: if the ports run out, the allocator is left as it was before the call,
+        including the previous allocation of the lab.
+
+        Args:
+            lab_key: string, unique key of the lab in the batch
+            node_ids: iterable of EVE node IDs
+
+        Returns:
+            dictionary, EVE node ID to port mapping
+
+        Raises:
+            exceptions.ConsolePortsExhausted if there are not enough free ports
+        """
+        previous = self.labs.get(lab_key, {})
+        node_ids = list(node_ids)
+        kept_ids = set(node_ids)
+        cursor = self.cursor
+        released = [port for node_id, port in previous.items()
+                    if node_id not in kept_ids and self._is_owned(port)]
+        for port in released:
+            self._clear(port)
+
+        ports = {}
+        allocated = []
+        try:
+            for node_id in node_ids:
+                port = previous.get(node_id)
+                if port is not None and self._is_owned(port):
+                    # the port is still marked as used by the previous allocation
+                    ports[node_id] = port
+                else:
+                    ports[node_id] = self.allocate_port()
+                    allocated.append(ports[node_id])
+        except exceptions.ConsolePortsExhausted:
+            for port in allocated:
+                self._clear(port)
+            for port in released:
+                self._set(port)
+            self.cursor = cursor
+            raise
+        self.labs[lab_key] = ports
+        return ports
+
+    def _is_owned(self, port):
+        """Checks if the port of a loaded allocation is marked as used on behalf of its lab"""
+        return self.start_port <= port <= self.end_port and port not in self.reserved
+
+    def update(self, labs):
+        """
+        Takes over allocations made by another allocator with the same state, e.g. in a child process
+
+        Args:
+            labs: dictionary, lab key to {EVE node ID: port} mapping
+
+        Returns:
+            None
+        """
+        for lab_key, ports in labs.items():
+            for port in self.labs.pop(lab_key, {}).values():
+                if self._is_owned(port):
+                    self._clear(port)
+            self._load_lab(lab_key, ports)
+
+    def _load_lab(self, lab_key, ports):
+        loaded = {}
+        for node_id, port in ports.items():
+            if self.is_available(port):
+                self._set(port)
+                loaded[node_id] = port
+        self.labs[lab_key] = loaded
+
+    def to_dict(self):
+        return {'start_port': self.start_port, 'end_port': self.end_port, 'labs': self.labs}
+
+    @classmethod
+    def load(cls, path, start_port, end_port, reserved=()):
+        """
+        Creates an allocator and restores allocations from the JSON map if it exists
+
+        Ports which are outside of the range, reserved or used twice are dropped and are allocated again on assign.
+
+        Args:
+            path: string, path to the JSON map
+            start_port: int, first port of the range
+            end_port: int, last port of the range
+            reserved: iterable of (first port, last port) tuples
+
+        Returns:
+            ConsolePortAllocator object
+        """
+        allocator = cls(start_port, end_port, reserved)
+        try:
+            with open(path) as f:
+                labs = json.load(f)['labs']
+        except FileNotFoundError:
+            return allocator
+        for lab_key in sorted(labs):
+            allocator._load_lab(lab_key, labs[lab_key])
+        return allocator
+
+    def save(self, path):
+        """
+        Atomically writes allocations to the JSON map
+
+        Args:
+            path: string, path to the JSON map
+
+        Returns:
+            None
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w') as f:
+            f.write(json.dumps(self.to_dict(), indent=4, sort_keys=True))
+        os.replace(temp_path, path)
+
+
+def create_console_port_allocator(args, shard=None, suffix=''):
+    """
+    Creates the allocator if --allocate_console_ports is specified
+
+    Args:
+        args: parsed command line arguments
+        shard: tuple (K, N) or None, a sharded run uses only its slice of the port range
+        suffix: string, suffix of the default map file name
+
+    Returns:
+        tuple (ConsolePortAllocator object or None, path to the JSON map or None)
+    """
+    if not args.allocate_console_ports:
+        return None, None
+    path = args.console_port_map or os.path.join(args.dst_dir, CONSOLE_PORT_MAP_FILENAME.format(suffix=suffix))
+    start_port, end_port = split_port_range(args.console_start_port, args.console_end_port, shard)
+    return ConsolePortAllocator.load(path, start_port, end_port, args.console_reserved or ()), path
+
+
+def merge_console_port_maps(paths, path):
+    """
+    Combines JSON maps written by sharded runs into a single map
+
+    Args:
+        paths: iterable of paths to the JSON maps of shards
+        path: string, path to the merged JSON map
+
+    Returns:
+        None
+    """
+    allocators = []
+    for shard_path in paths:
+        with open(shard_path) as f:
+            allocators.append(json.load(f))
+    if not allocators:
+        return
+    merged = ConsolePortAllocator(min(allocator['start_port'] for allocator in allocators),
+                                  max(allocator['end_port'] for allocator in allocators))
+    for allocator in allocators:
+        merged.update(allocator['labs'])
+    merged.save(path)
@@ -5,30 +5,41 @@ import copy
 from bs4 import BeautifulSoup
 
 import json_templates
-from helper import Point
 
 CSS_LEFT_RE = re.compile(r'left:\s*(?P<eve_x>\d+)')
 CSS_TOP_RE = re.compile(r'top:\s*(?P<eve_y>\d+)')
 
 
+def parse_eve_html(eve_html):
+    """
+    Extracts the position and the text of an EVE-NG text object
+
+    Args:
+        eve_html: bytes or string, decoded HTML of the text object
+
+    Returns:
+        tuple (eve_x, eve_y, text)
+    """
+    parsed_html = BeautifulSoup(eve_html, 'lxml')
+    for br in parsed_html.find_all("br"):
+        br.replace_with("\n")
+    css = parsed_html.div['style']
+    return (int(CSS_LEFT_RE.search(css).group('eve_x')),
+            int(CSS_TOP_RE.search(css).group('eve_y')),
+            parsed_html.text.strip())
+
+
 class Drawing(object):
     SVG_TEMPLATE = ("<svg height=\"50\" width=\"150\"><text fill=\"#000000\" fill-opacity=\"1.0\""
                     " font-family=\"TypeWriter\" font-size=\"14.0\" font-weight=\"bold\">"
                     "{text}</text></svg>")
 
-    def __init__(self, eve_html, topology=None):
+    def __init__(self, eve_coordinates, text, topology=None, eve_id=None):
         self.uuid = uuid.uuid4()
         self.topology = topology
-
-        self.eve_parsed_html = BeautifulSoup(eve_html, 'lxml')
-        for br in self.eve_parsed_html.find_all("br"):
-            br.replace_with("\n")
-        css = self.eve_parsed_html.div['style']
-
-        self.eve_coordinates = Point(int(CSS_LEFT_RE.search(css).group('eve_x')),
-                                     int(CSS_TOP_RE.search(css).group('eve_y')))
-
-        self.text = self.eve_parsed_html.text.strip()
+        self.eve_id = eve_id
+        self.eve_coordinates = eve_coordinates
+        self.text = text
 
     def get_gns_coordinates(self):
         return self.topology.get_gns_coordinates(self.eve_coordinates)
@@ -0,0 +1,243 @@
+import collections
+import json
+import os
+import re
+
+from config_store import has_content, remove_file
+from ports import IOL_PORTS_PER_ADAPTER
+from sync import ProjectSync
+
+
+EMITTERS = collections.OrderedDict()
+
+# EVE-NG template: (containerlab kind, image repository), the EVE-NG image name is used as the image tag.
+# Nodes of other templates can't be run by containerlab and are skipped.
+CONTAINERLAB_KINDS = {
+    'iol': ('cisco_iol', 'vrnetlab/cisco_iol'),
+    'vios': ('cisco_vios', 'vrnetlab/cisco_vios'),
+    'csr1000v': ('cisco_csr1000v', 'vrnetlab/cisco_csr1000v'),
+    'csr1000vng': ('cisco_csr1000v', 'vrnetlab/cisco_csr1000v'),
+    'nxosv9k': ('cisco_n9kv', 'vrnetlab/cisco_n9kv'),
+    'xrv': ('cisco_xrv', 'vrnetlab/cisco_xrv'),
+    'xrv9k': ('cisco_xrv9k', 'vrnetlab/cisco_xrv9k'),
+}
+INVALID_IMAGE_TAG_CHARACTERS_RE = re.compile(r'[^A-Za-z0-9_.-]')
+
+
+def register_emitter(cls):
+    """
+    Class decorator which adds an emitter to the registry under its name
+
+    Args:
+        cls: subclass of Emitter
+
+    Returns:
+        the same class
+    """
+    EMITTERS[cls.name] = cls
+    return cls
+
+
+def get_emitter(name):
+    """
+    Gets an emitter instance by its name
+
+    Args:
+        name: string, name of the output format
+
+    Returns:
+        Emitter object
+
+    Raises:
+        ValueError if there is no emitter with such name
+    """
+    try:
+        return EMITTERS[name]()
+    except KeyError:
+        raise ValueError(f'Unknown output format {name}, supported formats: {", ".join(EMITTERS)}')
+
+
+class Emitter(object):
+    """Base class for output formats.
+
+    Emitters should only use topology.model (LabModel), which is built once per parsed lab.
+    The GNS3 emitter is the exception, it overrides write, as GNS3 specific geometry lives
+    in the Node/Link/Drawing objects and ProjectSync decides which files of the project are written.
+
+    Attributes:
+        name (str): name of the output format used on the command line
+        skipped (list): messages about elements which can't be represented in the format, printed by write
+    """
+    name = None
+
+    def __init__(self):
+        self.skipped = []
+
+    def emit(self, topology):
+        """
+        Builds output files for the topology
+
+        Args:
+            topology: Topology object
+
+        Returns:
+            iterable of (relative path, bytes) tuples, paths are relative to the lab directory
+        """
+        raise NotImplementedError
+
+    def write(self, topology, dst_dir):
+        """
+        Writes output files into the lab directory inside dst_dir
+
+        Args:
+            topology: Topology object
+            dst_dir: string, destination directory
+
+        Files which are already in place with the same content, e.g. configs written by the gns3 emitter
+        into the same lab directory, are left untouched, so hardlinks of --dedup_configs are kept.
+
+        Returns:
+            list of paths to the written files
+        """
+        lab_dir = os.path.join(dst_dir, topology.name)
+        paths = []
+        for relative_path, content in self.emit(topology):
+            path = os.path.join(lab_dir, relative_path)
+            paths.append(path)
+            if has_content(path, content):
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            remove_file(path)
+            with open(path, 'wb') as f:
+                f.write(content)
+        for message in self.skipped:
+            print(f'Skipped in {self.name} output of {topology.name}: {message}')
+        print(f'Successfully written {self.name} output at {lab_dir}')
+        return paths
+
+
+@register_emitter
+class Gns3Emitter(Emitter):
+    name = 'gns3'
+
+    def write(self, topology, dst_dir):
+        topology.dst_dir = dst_dir
+        project_sync = ProjectSync(topology, os.path.join(dst_dir, topology.name))
+        return project_sync.write(update=topology.options.update)
+
+
+@register_emitter
+class ContainerlabEmitter(Emitter):
+    name = 'containerlab'
+
+    @staticmethod
+    def _scalar(value):
+        # JSON strings are valid YAML scalars, which saves us from a YAML dependency
+        return json.dumps(value)
+
+    @staticmethod
+    def get_image(repository, node):
+        tag = INVALID_IMAGE_TAG_CHARACTERS_RE.sub('-', os.path.basename(node.gns_image or ''))[:128]
+        return f'{repository}:{tag or "latest"}'
+
+    @staticmethod
+    def get_interface_name(node, endpoint):
+        """
+        Gets the containerlab name of the interface, ethN where eth0 is the management interface of every kind
+
+        IOL ports are numbered continuously, e0/1 is eth1 and e1/0 is eth4,
+        a QEMU adapter N is ethN, e.g. Gi0/1 of vIOS is eth1.
+
+        Args:
+            node: NodeModel object
+            endpoint: EndpointModel object
+
+        Returns:
+            string or None if the interface can't be connected in containerlab
+        """
+        if endpoint.adapter_number is None:
+            return None
+        if node.node_type == 'iol':
+            if endpoint.adapter_number >= (node.ethernet_adapters_number or 0):
+                return None
+            index = endpoint.adapter_number * IOL_PORTS_PER_ADAPTER + endpoint.port_number
+        else:
+            index = endpoint.adapter_number
+        return f'eth{index}' if index > 0 else None
+
+    def emit(self, topology):
+        lab = topology.model
+        id_to_name = {node.eve_node_id: node.name for node in lab.nodes}
+        id_to_node = {}
+        lines = [f'name: {self._scalar(lab.name)}', 'topology:', '  nodes:']
+        for node in lab.nodes:
+            if node.template not in CONTAINERLAB_KINDS:
+                self.skipped.append(f'node {node.name}, template {node.template} has no containerlab kind')
+                continue
+            kind, repository = CONTAINERLAB_KINDS[node.template]
+            id_to_node[node.eve_node_id] = node
+            lines.append(f'    {self._scalar(node.name)}:')
+            lines.append(f'      kind: {kind}')
+            if kind == 'cisco_iol' and node.role == 'switch':
+                lines.append('      type: L2')
+            lines.append(f'      image: {self._scalar(self.get_image(repository, node))}')
+            if node.config:
+                lines.append(f'      startup-config: {self._scalar("configs/" + node.name + "_startup-config.cfg")}')
+        lines.append('  links:')
+        for link in lab.links:
+            description = ' - '.join(f'{id_to_name.get(endpoint.eve_node_id)}:{endpoint.interface_name}'
+                                     for endpoint in link.endpoints)
+            if any(endpoint.link_type != 'ethernet' for endpoint in link.endpoints):
+                self.skipped.append(f'link {description}, containerlab supports only ethernet links')
+                continue
+            if any(endpoint.eve_node_id not in id_to_node for endpoint in link.endpoints):
+                self.skipped.append(f'link {description}, it is connected to a skipped node')
+                continue
+            endpoints = []
+            for endpoint in link.endpoints:
+                node = id_to_node[endpoint.eve_node_id]
+                interface_name = self.get_interface_name(node, endpoint)
+                if interface_name is None:
+                    break
+                endpoints.append(self._scalar(f'{node.name}:{interface_name}'))
+            else:
+                lines.append(f'    - endpoints: [{", ".join(endpoints)}]')
+                continue
+            self.skipped.append(f'link {description}, interface {endpoint.interface_name} of node {node.name} '
+                                f'has no containerlab equivalent, eth0 is the management interface')
+        yield f'{lab.name}.clab.yml', ('\n'.join(lines) + '\n').encode()
+        for node in id_to_node.values():
+            if node.config:
+                yield os.path.join('configs', f'{node.name}_startup-config.cfg'), node.config
+
+
+@register_emitter
+class InventoryEmitter(Emitter):
+    name = 'inventory'
+
+    def emit(self, topology):
+        lab = topology.model
+        inventory = {
+            'name': lab.name,
+            'nodes': [
+                {
+                    'eve_node_id': node.eve_node_id,
+                    'name': node.name,
+                    'node_type': node.node_type,
+                    'template': node.template,
+                    'image': node.gns_image,
+                    'cpus': node.cpus,
+                    'ram': node.ram,
+                    'interfaces': [interface.name for interface in node.interfaces],
+                    'has_config': bool(node.config),
+                }
+                for node in lab.nodes
+            ],
+            'links': [
+                [{'eve_node_id': endpoint.eve_node_id, 'interface': endpoint.interface_name}
+                 for endpoint in link.endpoints]
+                for link in lab.links
+            ],
+            'text_objects': [drawing.text for drawing in lab.drawings],
+        }
+        yield f'{lab.name}.inventory.json', json.dumps(inventory, indent=4, sort_keys=True).encode()
@@ -1,9 +1,17 @@
 #!/usr/bin/env python3
 import argparse
+import json
 import os
-import pathlib
+import sys
 
-from topology import Topology
+from batch import BatchRunner, convert_topology, create_push_client, find_topology_files, merge_shard_summaries
+from catalog import CATALOG_FILENAME, Catalog
+from console_ports import create_console_port_allocator, get_lab_key, parse_port_range
+from emitters import EMITTERS
+from lint import lint_files
+from placement import load_computes
+from scan import build_scan_report
+from sharding import parse_shard
 
 
 def get_arguments():
@@ -20,6 +28,8 @@ def get_arguments():
                        type=argparse.FileType('r'))
     group.add_argument('-s', '--src_dir',
                        help='specify source folder containing *.unl files')
+    group.add_argument('--merge_shards', action='store_true',
+                       help='combine summaries of --shard runs in DST_DIR into DST_DIR/summary.json')
     parser.add_argument('-d', '--dst_dir', default='dst/',
                         help='specify destination folder for resulting files')
     parser.add_argument('-v', '--verbose', help='increase output verbosity',
@@ -27,50 +37,176 @@ def get_arguments():
     parser.add_argument('-c', '--console_start_port',
                         help='specify a starting port for console connections, default is 5000',
                         type=int, default=5000)
+    parser.add_argument('--allocate_console_ports', action='store_true',
+                        help='allocate console ports which are unique across all converted labs instead of '
+                             'CONSOLE_START_PORT + EVE node ID')
+    parser.add_argument('--console_end_port', type=int, default=10000,
+                        help='specify the last port for allocated console ports, default is 10000')
+    parser.add_argument('--console_reserved', type=parse_port_range, action='append',
+                        help='specify a port or a range of ports, e.g. 5900-5999, which must not be allocated, '
+                             'can be repeated')
+    parser.add_argument('--console_port_map',
+                        help='specify path to the map of allocated console ports, which is reused by later runs, '
+                             'default is DST_DIR/console-ports.json')
     parser.add_argument('--l2_iol_image',
                         help='Specify path to L2 IOL image')
     parser.add_argument('--l3_iol_image',
                         help='Specify path to L3 IOL image')
+    parser.add_argument('--computes', type=load_computes,
+                        help='specify a JSON file with GNS3 compute hosts and their cpus/ram capacity '
+                             'to distribute nodes between them')
+    parser.add_argument('-o', '--output_format', action='append', choices=list(EMITTERS),
+                        help='specify output format, can be repeated to produce several formats '
+                             'from a single parse, default is gns3')
+    parser.add_argument('--update', action='store_true',
+                        help='patch existing GNS3 projects in DST_DIR, only changed nodes, links, drawings '
+                             'and configs are rewritten')
+    parser.add_argument('--dedup_configs', action='store_true',
+                        help='write every distinct startup-config once to DST_DIR/.config-store and hardlink it '
+                             'into projects')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='specify a number of worker processes used inside a single large lab, default is 1')
+    parser.add_argument('--scan', action='store_true',
+                        help='do not convert, only print node/link/image stats of source files as JSON')
+    parser.add_argument('--lint', action='store_true',
+                        help='do not convert, only check source files for problems which break the conversion, '
+                             'exit code is 1 if any error is found')
+    parser.add_argument('--journal',
+                        help='specify path to the journal of --src_dir runs, default is DST_DIR/convert-journal.jsonl')
+    parser.add_argument('--resume', action='store_true',
+                        help='skip files which were successfully converted according to the journal')
+    parser.add_argument('--catalog',
+                        help='specify path to the SQLite catalog of --src_dir runs, default is DST_DIR/catalog.sqlite3')
+    parser.add_argument('--timeout', type=float,
+                        help='specify a maximum number of seconds to convert one file in --src_dir mode')
+    parser.add_argument('--metrics_jsonl',
+                        help='append per-file and per-batch metric events of --src_dir runs to this JSON lines file')
+    parser.add_argument('--metrics_prom',
+                        help='write metrics of --src_dir runs to this file in the Prometheus text format')
+    parser.add_argument('--push', metavar='URL',
+                        help='also create converted projects on GNS3 server, e.g. http://127.0.0.1:3080')
+    parser.add_argument('--push_concurrency', type=int, default=8,
+                        help='specify a maximum number of concurrent requests to GNS3 server, default is 8')
+    parser.add_argument('--push_retries', type=int, default=3,
+                        help='specify a number of retries of a failed request to GNS3 server, default is 3')
+    parser.add_argument('--shard', type=parse_shard,
+                        help='convert only the K-th of N deterministic slices of --src_dir, in the format K/N')
 
     args = parser.parse_args()
+    if not args.output_format:
+        args.output_format = ['gns3']
     return args
 
 
-def convert_topology(src_topology_file, args, dst_dir):
-    # if src_dir is not None:
-    #     path = pathlib.Path(src_dir)
-    #     dst_dir = args.dst_dir / path.relative_to(*path.parts[:1])
-    # else:
-    #     dst_dir = args.dst_dir
-    topology = Topology(src_topology_file, args, dst_dir)
-    topology.write_configs()
-    topology.write_gns_topology_json()
+def get_query_arguments(argv):
+    """
+    Creates an argument parser of the query subcommand
+
+    Args:
+        argv: list of command line arguments after 'query'
+
+    Returns:
+        parsed ArgumentParser object
+    """
+    parser = argparse.ArgumentParser(prog='eve-to-gns3-converter.py query',
+                                     description='find converted labs in the catalog, all conditions must match')
+    parser.add_argument('-d', '--dst_dir', default='dst/',
+                        help='specify destination folder of --src_dir runs')
+    parser.add_argument('--catalog',
+                        help='specify path to the SQLite catalog, default is DST_DIR/catalog.sqlite3')
+    parser.add_argument('--name',
+                        help='lab name, SQL LIKE pattern, e.g. %%CCIE%%')
+    parser.add_argument('--image',
+                        help='image of any node, SQL LIKE pattern, e.g. %%vios%%')
+    parser.add_argument('--node_type',
+                        help='node type of any node, e.g. qemu')
+    parser.add_argument('--template',
+                        help='template of any node, e.g. viosl2')
+    parser.add_argument('--min_nodes', type=int,
+                        help='minimum number of nodes')
+    parser.add_argument('--max_nodes', type=int,
+                        help='maximum number of nodes')
+    parser.add_argument('--status',
+                        help='status of the last conversion: ok, failed or timeout')
+    parser.add_argument('--sql',
+                        help='run an arbitrary SQL statement instead, tables are labs and lab_inventory')
+    return parser.parse_args(argv)
+
+
+def query(argv):
+    args = get_query_arguments(argv)
+    catalog_path = args.catalog or os.path.join(args.dst_dir, CATALOG_FILENAME.format(suffix=''))
+    if not os.path.exists(catalog_path):
+        raise FileNotFoundError(f'Catalog {catalog_path} does not exist, convert a folder with --src_dir first')
+    catalog = Catalog(catalog_path)
+    try:
+        if args.sql:
+            rows = catalog.execute(args.sql)
+        else:
+            rows = catalog.query(name=args.name, image=args.image, node_type=args.node_type, template=args.template,
+                                 min_nodes=args.min_nodes, max_nodes=args.max_nodes, status=args.status)
+    finally:
+        catalog.close()
+    print(json.dumps(rows, indent=4, sort_keys=True))
+
+
+def get_source_paths(args):
+    if args.src_topology_file:
+        return [args.src_topology_file.name]
+    paths = sorted(full_path for full_path, _ in find_topology_files(args.src_dir))
+    if not paths:
+        raise FileNotFoundError("No *.unl files have been found.")
+    return paths
+
+
+def scan(args):
+    print(json.dumps(build_scan_report(get_source_paths(args)), indent=4, sort_keys=True))
+
+
+def lint(args):
+    paths = get_source_paths(args)
+    errors, warnings = lint_files(paths)
+    print(f'Linted {len(paths)} files: {errors} errors, {warnings} warnings')
+    if errors:
+        sys.exit(1)
 
 
 def main():
+    if sys.argv[1:2] == ['query']:
+        query(sys.argv[2:])
+        return
+
     args = get_arguments()
 
-    if args.src_topology_file:
+    if args.scan:
+        scan(args)
+
+    elif args.lint:
+        lint(args)
+
+    elif args.src_topology_file:
         with args.src_topology_file as f:
             src_topology_file = f.read()
-        convert_topology(src_topology_file, args, args.dst_dir)
+        push_client = create_push_client(args)
+        console_ports, console_port_map_path = create_console_port_allocator(args)
+        try:
+            convert_topology(src_topology_file, args, args.dst_dir, push_client,
+                             console_ports, get_lab_key(args.src_topology_file.name))
+        finally:
+            if push_client is not None:
+                push_client.close()
+            if console_ports is not None:
+                console_ports.save(console_port_map_path)
 
     elif args.src_dir:
-        count = 0
-        for dir_name, _, files in os.walk(args.src_dir):
-            relative_dir = os.path.relpath(dir_name, args.src_dir)
-            dst_dir = os.path.join(args.dst_dir, relative_dir)
-            for filename in files:
-                if filename.endswith(".unl"):
-                    full_path = os.path.join(dir_name, filename)
-                    print(f'Parsing {full_path}')
-                    with open(full_path) as file:
-                        src_topology_file = file.read()
-                    convert_topology(src_topology_file, args, dst_dir)
-                    count += 1
-
-        if not count:
-            raise FileNotFoundError("No *.unl files have been found.")
+        if not BatchRunner(args).run():
+            sys.exit(1)
+
+    elif args.merge_shards:
+        summary = merge_shard_summaries(args.dst_dir)
+        print(json.dumps(summary, indent=4, sort_keys=True))
+        if summary['failed'] or summary['missing_shards']:
+            sys.exit(1)
 
 
 if __name__ == '__main__':
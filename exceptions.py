@@ -4,3 +4,15 @@ class MissingInterface(Exception):
 
 class InvalidLink(Exception):
     pass
+
+
+class InvalidInterfaceName(Exception):
+    pass
+
+
+class ConsolePortsExhausted(Exception):
+    pass
+
+
+class InsufficientComputeCapacity(Exception):
+    pass
@@ -0,0 +1,184 @@
+import concurrent.futures
+import http.client
+import json
+import queue
+import threading
+import time
+import urllib.parse
+
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# these attributes are calculated by GNS3 server and are rejected on node creation
+READ_ONLY_NODE_KEYS = ('width', 'height')
+
+
+class Gns3ApiError(Exception):
+    def __init__(self, method, path, status, body):
+        super().__init__(f'{method} {path} failed with status {status}: {body[:200]!r}')
+        self.status = status
+
+
+class ConnectionPool(object):
+    """Pool of keep-alive HTTP connections to one server.
+
+    Connections are created lazily, at most max_size of them exist at the same time.
+    A connection which failed is closed and not returned to the pool.
+    """
+    def __init__(self, url, max_size, timeout):
+        parsed_url = urllib.parse.urlsplit(url)
+        self.connection_class = (http.client.HTTPSConnection if parsed_url.scheme == 'https'
+                                 else http.client.HTTPConnection)
+        self.host = parsed_url.hostname
+        self.port = parsed_url.port
+        self.base_path = parsed_url.path.rstrip('/')
+        self.timeout = timeout
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(max_size)
+
+    def acquire(self):
+        self.slots.acquire()
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            return self.connection_class(self.host, self.port, timeout=self.timeout)
+
+    def release(self, connection, reusable=True):
+        if reusable:
+            self.idle.put(connection)
+        else:
+            connection.close()
+        self.slots.release()
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class Gns3Client(object):
+    """Client of GNS3 server REST API v2 which creates projects from Topology objects.
+
+    Attributes:
+        url (str): base URL of GNS3 server, e.g. http://127.0.0.1:3080
+        concurrency (int): maximum number of requests in flight
+        retries (int): number of retries of a failed request
+        requests (int): number of sent requests, including retries
+        retried (int): number of retries
+    """
+    def __init__(self, url, concurrency=8, retries=3, timeout=30, backoff=0.5):
+        self.url = url
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.pool = ConnectionPool(url, max_size=concurrency, timeout=timeout)
+        self.requests = 0
+        self.retried = 0
+        self._lock = threading.Lock()
+
+    def request(self, method, path, body=None):
+        """
+        Sends a request, retrying on connection errors and retryable statuses with exponential backoff
+
+        Args:
+            method: string, HTTP method
+            path: string, API path starting with /v2
+            body: dictionary to send as JSON or bytes to send as is
+
+        Returns:
+            parsed JSON response or None if the response is empty
+
+        Raises:
+            Gns3ApiError if the server responded with an error
+            OSError or http.client.HTTPException if the server is unreachable after all retries
+        """
+        if isinstance(body, dict):
+            body = json.dumps(body).encode()
+            headers = {'Content-Type': 'application/json'}
+        else:
+            headers = {'Content-Type': 'application/octet-stream'}
+
+        for attempt in range(self.retries + 1):
+            if attempt:
+                with self._lock:
+                    self.retried += 1
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            with self._lock:
+                self.requests += 1
+
+            connection = self.pool.acquire()
+            try:
+                connection.request(method, self.pool.base_path + path, body=body, headers=headers)
+                response = connection.getresponse()
+                data = response.read()
+            except (OSError, http.client.HTTPException):
+                self.pool.release(connection, reusable=False)
+                if attempt == self.retries:
+                    raise
+                continue
+            self.pool.release(connection, reusable=not response.will_close)
+
+            if response.status in RETRY_STATUSES and attempt < self.retries:
+                continue
+            if response.status == 409 and attempt:
+                # the previous attempt has reached the server and created the object, IDs are set by the client
+                return None
+            if response.status >= 400:
+                raise Gns3ApiError(method, path, response.status, data)
+            return json.loads(data) if data else None
+
+    def push_topology(self, topology):
+        """
+        Creates a project with all nodes, configs, links and drawings of the topology
+
+        Nodes are created before links, as links refer to them. Within every stage requests are sent concurrently.
+
+        Args:
+            topology: Topology object
+
+        Returns:
+            dictionary with number of seconds spent on every stage
+        """
+        timings = {}
+        start_time = time.perf_counter()
+        project_id = str(topology.uuid)
+        project_path = f'/v2/projects/{project_id}'
+
+        def run_stage(name, function, items):
+            stage_start_time = time.perf_counter()
+            # list() waits for all requests of the stage and raises the first exception
+            list(executor.map(function, items))
+            timings[name] = round(time.perf_counter() - stage_start_time, 6)
+
+        def create_node(node):
+            node_json = node.build_gns_topology_json()
+            for key in READ_ONLY_NODE_KEYS:
+                node_json.pop(key, None)
+            self.request('POST', f'{project_path}/nodes', node_json)
+
+        def upload_config(node):
+            self.request('POST', f'{project_path}/nodes/{node.uuid}/files/startup-config.cfg', node.config)
+
+        def create_link(link):
+            self.request('POST', f'{project_path}/links', link.build_gns_topology_json())
+
+        def create_drawing(drawing):
+            self.request('POST', f'{project_path}/drawings', drawing.build_gns_topology_json())
+
+        requests_before = self.requests
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            run_stage('project', lambda _: self.request('POST', '/v2/projects',
+                                                        {'name': topology.name, 'project_id': project_id}), [None])
+            run_stage('nodes', create_node, topology.nodes)
+            run_stage('configs', upload_config, [node for node in topology.nodes if node.config])
+            run_stage('links', create_link, topology.links)
+            run_stage('drawings', create_drawing, topology.text_objects)
+            run_stage('close', lambda _: self.request('POST', f'{project_path}/close'), [None])
+
+        timings['total'] = round(time.perf_counter() - start_time, 6)
+        timings['requests'] = self.requests - requests_before
+        return timings
+
+    def close(self):
+        self.pool.close()
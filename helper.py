@@ -6,6 +6,8 @@ def sign(x):
 
 
 class Point(object):
+    __slots__ = ('coordinates',)
+
     def __init__(self, x=None, y=None, coordinates=None):
         if coordinates is not None:
             self.coordinates = coordinates
@@ -60,6 +62,8 @@ class Point(object):
 
 
 class Size(Point):
+    __slots__ = ()
+
     @property
     def width(self):
         return self.x
@@ -0,0 +1,97 @@
+import datetime
+import json
+import os
+
+
+class Journal(object):
+    """Append-only JSON-lines journal of a batch conversion.
+
+    Every processed file gets one line with its status, duration and hashes of the source and the output.
+    The journal is never rewritten: later entries for the same file win, which makes it safe
+    to interrupt a run at any point and resume it later.
+
+    Attributes:
+        path (str): path to the journal file
+    """
+    STATUS_OK = 'ok'
+    STATUS_FAILED = 'failed'
+    STATUS_TIMEOUT = 'timeout'
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def read(self):
+        """
+        Reads all entries of the journal, a partially written last line is ignored
+
+        Returns:
+            list of dictionaries
+        """
+        entries = []
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        # the run was interrupted in the middle of writing this line
+                        continue
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def completed(self):
+        """
+        Finds files which were successfully converted according to the last entry for every file
+
+        Returns:
+            dictionary, where key is the source path and value is the source hash
+        """
+        result = {}
+        for entry in self.read():
+            if entry.get('status') == self.STATUS_OK:
+                result[entry['path']] = entry.get('source_hash')
+            else:
+                result.pop(entry['path'], None)
+        return result
+
+    def record(self, path, status, seconds, source_hash=None, output_hash=None, error=None, **extra):
+        """
+        Appends a new entry to the journal and flushes it to disk
+
+        Args:
+            path: string, path of the source file
+            status: string, one of STATUS_OK, STATUS_FAILED, STATUS_TIMEOUT
+            seconds: float, time spent on the file
+            source_hash: string, sha256 of the source file
+            output_hash: string, sha256 of all written output files
+            error: string, error description if the conversion has failed
+            **extra: any other JSON serializable values to store
+
+        Returns:
+            dictionary, the written entry
+        """
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, 'a')
+        entry = {
+            'path': path,
+            'status': status,
+            'seconds': round(seconds, 6),
+            'source_hash': source_hash,
+            'output_hash': output_hash,
+            'error': error,
+            'time': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        }
+        entry.update(extra)
+        self._file.write(json.dumps(entry, sort_keys=True) + '\n')
+        self._file.flush()
+        return entry
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,275 @@
+import base64
+import binascii
+import collections
+from typing import NamedTuple
+from xml.parsers.expat import ExpatError
+
+import xmltodict
+
+import ports
+from drawing import parse_eve_html
+from node import INTERFACE_NAME_RE, Node
+from topology import XML_FORCE_LIST
+
+
+ERROR = 'error'
+WARNING = 'warning'
+SUPPORTED_NODE_TYPES = tuple(Node.NODE_TYPE_FIELDS)
+REQUIRED_NODE_ATTRIBUTES = {
+    'common': ('@id', '@name', '@type', '@template', '@image', '@icon', '@left', '@top'),
+    'iol': ('@ethernet', '@serial'),
+    'qemu': ('@console', '@cpu', '@ram', '@ethernet'),
+}
+# attributes which Node.parse_node_dict converts to int, positions may also be percentages of the scene
+INTEGER_NODE_ATTRIBUTES = {
+    'common': ('@left', '@top'),
+    'iol': ('@ethernet', '@serial'),
+    'qemu': ('@cpu', '@ram', '@ethernet'),
+}
+PERCENT_NODE_ATTRIBUTES = ('@left', '@top')
+
+
+class LintIssue(NamedTuple):
+    severity: str
+    code: str
+    element: str
+    message: str
+
+    def __str__(self):
+        return f'{self.severity} {self.code} {self.element}: {self.message}'
+
+
+def _as_list(value):
+    """Containers like <nodes> are parsed as None when they are empty"""
+    return value if isinstance(value, list) else []
+
+
+def _is_integer(value):
+    try:
+        int(value)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def _get_port_table(node_dict):
+    """Builds the same port table as the converter, None if the adapter numbers are not valid"""
+    try:
+        if node_dict['@type'] == 'iol':
+            return ports.build_iol_port_table(int(node_dict['@ethernet']), int(node_dict['@serial']))
+        return ports.build_qemu_port_table(node_dict['@template'], int(node_dict['@ethernet']))
+    except (KeyError, ValueError):
+        return None
+
+
+class LabLinter(object):
+    """Finds problems which would make the conversion of a lab fail or produce a broken project.
+
+    The lab is parsed once into the same structure Topology reads (see topology.XML_FORCE_LIST) and indexed
+    by node and network IDs, then every node, interface, network, config and text object is checked once
+    against the indexes, so linting is O(n) in the size of the lab.
+    All issues are collected instead of stopping at the first one.
+
+    Attributes:
+        issues (list): LintIssue objects found so far
+    """
+    def __init__(self):
+        self.issues = []
+
+    def add(self, severity, code, element, message):
+        self.issues.append(LintIssue(severity, code, element, message))
+
+    def lint(self, source):
+        """
+        Lints the source *.unl file
+
+        Args:
+            source: string, bytes or file object, content of the source *.unl file
+
+        Returns:
+            list of LintIssue objects
+        """
+        try:
+            lab = xmltodict.parse(source, force_list=XML_FORCE_LIST)['lab']
+        except (ExpatError, KeyError, TypeError) as e:
+            self.add(ERROR, 'invalid-xml', 'lab', f'file is not a valid EVE-NG lab: {e}')
+            return self.issues
+        if not lab.get('@name'):
+            self.add(ERROR, 'missing-attribute', 'lab', 'lab has no name')
+
+        topology = lab.get('topology') or {}
+        node_dicts = _as_list((topology.get('nodes') or {}).get('node'))
+        network_dicts = _as_list((topology.get('networks') or {}).get('network'))
+        if not node_dicts:
+            self.add(ERROR, 'no-nodes', 'lab', 'lab has no nodes')
+
+        id_to_node_dict = {}
+        node_interface_ids = collections.defaultdict(set)
+        for node_dict in node_dicts:
+            node_id = node_dict.get('@id')
+            if node_id in id_to_node_dict:
+                self.add(ERROR, 'duplicate-id', f'node {node_id}', 'node ID is used by several nodes')
+            id_to_node_dict[node_id] = node_dict
+            node_interface_ids[node_id].update(int(interface_dict['@id'])
+                                               for interface_dict in _as_list(node_dict.get('interface'))
+                                               if _is_integer(interface_dict.get('@id') or ''))
+
+        network_members = collections.OrderedDict()
+        for network_dict in network_dicts:
+            network_id = network_dict.get('@id')
+            if network_id in network_members:
+                self.add(ERROR, 'duplicate-id', f'network {network_id}', 'network ID is used by several networks')
+            network_members[network_id] = 0
+
+        for node_dict in node_dicts:
+            self.lint_node(node_dict, id_to_node_dict, node_interface_ids, network_members)
+        for network_id, members in network_members.items():
+            self.lint_network(network_id, members)
+        # like Topology.get_objects_dict, only the first <objects> element is converted
+        objects_dicts = _as_list(lab.get('objects'))
+        if objects_dicts and objects_dicts[0]:
+            self.lint_objects(objects_dicts[0], id_to_node_dict)
+        for objects in objects_dicts[1:]:
+            if objects:
+                self.add(WARNING, 'ignored-objects', 'objects',
+                         'only the first <objects> element is converted, configs and text objects '
+                         'of other ones are ignored')
+        return self.issues
+
+    def lint_node(self, node_dict, id_to_node_dict, node_interface_ids, network_members):
+        """
+        Checks attributes and interfaces of the node
+
+        Modifies:
+            network_members - counts interfaces connected to every network
+        """
+        node_id = node_dict.get('@id')
+        element = f'node {node_id} ({node_dict.get("@name")})'
+        node_type = node_dict.get('@type')
+        if node_type not in SUPPORTED_NODE_TYPES:
+            self.add(ERROR, 'unsupported-node-type', element,
+                     f'node type {node_type} is not supported, only {", ".join(SUPPORTED_NODE_TYPES)}')
+            required = REQUIRED_NODE_ATTRIBUTES['common']
+        else:
+            required = REQUIRED_NODE_ATTRIBUTES['common'] + REQUIRED_NODE_ATTRIBUTES[node_type]
+        missing = [attribute[1:] for attribute in required if node_dict.get(attribute) is None]
+        if missing:
+            self.add(ERROR, 'missing-attribute', element, f'node has no {", ".join(missing)}')
+        integer_attributes = INTEGER_NODE_ATTRIBUTES['common'] + INTEGER_NODE_ATTRIBUTES.get(node_type, ())
+        for attribute in integer_attributes:
+            value = node_dict.get(attribute)
+            if value is None:
+                continue
+            if attribute in PERCENT_NODE_ATTRIBUTES and '%' in value:
+                value = value.strip('%')
+            if not _is_integer(value):
+                self.add(ERROR, 'invalid-attribute', element,
+                         f'{attribute[1:]} must be an integer, got {node_dict[attribute]!r}')
+
+        port_table = _get_port_table(node_dict) if node_type in SUPPORTED_NODE_TYPES else None
+        for interface_dict in _as_list(node_dict.get('interface')):
+            interface_element = f'{element} interface {interface_dict.get("@id")} ({interface_dict.get("@name")})'
+            link_type = interface_dict.get('@type')
+            if link_type == 'ethernet':
+                network_id = interface_dict.get('@network_id')
+                if network_id in network_members:
+                    network_members[network_id] += 1
+                else:
+                    self.add(WARNING, 'unknown-network', interface_element,
+                             f'network {network_id} does not exist, the interface is left unconnected')
+            elif link_type == 'serial':
+                remote_id = interface_dict.get('@remote_id')
+                remote_interface_id = interface_dict.get('@remote_if')
+                if remote_id not in id_to_node_dict:
+                    self.add(ERROR, 'unknown-remote-node', interface_element,
+                             f'serial link points to node {remote_id}, which does not exist')
+                elif remote_interface_id is None or not _is_integer(remote_interface_id):
+                    self.add(ERROR, 'unknown-remote-interface', interface_element,
+                             f'serial link has no valid remote interface ID, got {remote_interface_id!r}')
+                elif int(remote_interface_id) not in node_interface_ids[remote_id]:
+                    self.add(ERROR, 'unknown-remote-interface', interface_element,
+                             f'serial link points to interface {remote_interface_id} of node {remote_id}, '
+                             f'which does not exist')
+            else:
+                self.add(ERROR, 'unsupported-link-type', interface_element, f'link type {link_type} is not supported')
+
+            # mirrors Interface.get_adapter_port_number: QEMU interfaces fall back to their IDs
+            name = interface_dict.get('@name') or ''
+            if node_type == 'iol' and port_table is not None and name.lower() not in port_table \
+                    and INTERFACE_NAME_RE.match(name) is None:
+                self.add(ERROR, 'invalid-interface-name', interface_element,
+                         f'interface name {name} can\'t be resolved to an adapter and port')
+
+    def lint_network(self, network_id, members):
+        element = f'network {network_id}'
+        if members == 0:
+            self.add(WARNING, 'empty-network', element, 'network has no members and is skipped')
+        elif members == 1:
+            self.add(ERROR, 'single-member-network', element, 'network has only one member')
+        elif members > 2:
+            self.add(ERROR, 'multi-access-network', element,
+                     f'network has {members} members, only point-to-point networks are supported')
+
+    def lint_objects(self, objects, id_to_node_dict):
+        configs = _as_list((objects.get('configs') or {}).get('config'))
+        for config_dict in configs:
+            node_id = config_dict.get('@id')
+            element = f'config {node_id}'
+            if node_id not in id_to_node_dict:
+                self.add(ERROR, 'config-unknown-node', element,
+                         f'config belongs to node {node_id}, which does not exist')
+            try:
+                base64.b64decode(config_dict.get('#text') or '', validate=True)
+            except binascii.Error:
+                self.add(ERROR, 'invalid-config', element, 'config is not valid base64')
+
+        text_objects = _as_list((objects.get('textobjects') or {}).get('textobject'))
+        for text_object_dict in text_objects:
+            element = f'textobject {text_object_dict.get("@id")}'
+            if not text_object_dict.get('data'):
+                self.add(ERROR, 'missing-attribute', element, 'text object has no data')
+                continue
+            try:
+                parse_eve_html(base64.b64decode(text_object_dict['data'], validate=True))
+            except binascii.Error:
+                self.add(ERROR, 'invalid-text-object', element, 'text object data is not valid base64')
+            except (TypeError, KeyError, AttributeError, ValueError):
+                # parse_eve_html needs a <div> with left and top in its style
+                self.add(ERROR, 'invalid-text-object', element,
+                         'text object HTML has no <div> with left and top position')
+
+
+def lint_lab(source):
+    """
+    Lints the source *.unl file
+
+    Args:
+        source: string, bytes or file object, content of the source *.unl file
+
+    Returns:
+        list of LintIssue objects
+    """
+    return LabLinter().lint(source)
+
+
+def lint_files(paths):
+    """
+    Lints all source files and prints found issues
+
+    Args:
+        paths: iterable of paths to *.unl files
+
+    Returns:
+        tuple (number of errors, number of warnings)
+    """
+    errors = warnings = 0
+    for path in paths:
+        with open(path, 'rb') as f:
+            issues = lint_lab(f)
+        for issue in issues:
+            print(f'{path}: {issue}')
+            if issue.severity == ERROR:
+                errors += 1
+            else:
+                warnings += 1
+    return errors, warnings
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Measures how much memory the parsed objects of a lab take per node.
+
+Generates labs with scaling_guard.generate_lab and reports:
+    * shallow size of Node and Interface objects, which is what __slots__ saves,
+    * memory retained by a Topology beyond the parsed XML, per node including its interfaces and links.
+
+Example:
+    python3 memory_footprint.py --sizes 1000 10000
+"""
+import argparse
+import gc
+import sys
+import tracemalloc
+
+import xmltodict
+
+from options import ConversionOptions
+from scaling_guard import generate_lab
+from topology import XML_FORCE_LIST, Topology
+
+
+def get_shallow_size(obj):
+    """Size of the object itself and of its __dict__ if it has one, attribute values are not included"""
+    size = sys.getsizeof(obj)
+    attributes = getattr(obj, '__dict__', None)
+    if attributes is not None:
+        size += sys.getsizeof(attributes)
+    return size
+
+
+def measure_footprint(node_count):
+    """
+    Converts a generated lab and measures the memory of its objects
+
+    Args:
+        node_count: int, number of nodes in the generated lab
+
+    Returns:
+        dictionary with numbers of nodes and interfaces, bytes per Node object, per Interface object
+        and retained bytes per node
+    """
+    eve_xml = generate_lab(node_count)
+    parsed_eve_xml = xmltodict.parse(eve_xml, force_list=XML_FORCE_LIST)
+
+    # the parsed XML is kept by Topology, it is parsed upfront to measure only the objects built from it
+    original_parse = xmltodict.parse
+    xmltodict.parse = lambda *args, **kwargs: parsed_eve_xml
+    gc.collect()
+    tracemalloc.start()
+    try:
+        topology = Topology(eve_xml, ConversionOptions())
+        retained_bytes = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+        xmltodict.parse = original_parse
+
+    nodes = list(topology.nodes)
+    interfaces = [interface for node in nodes for interface in node.interfaces]
+    return {
+        'nodes': len(nodes),
+        'interfaces': len(interfaces),
+        'node_object_bytes': sum(get_shallow_size(node) for node in nodes) / len(nodes),
+        'interface_object_bytes': sum(get_shallow_size(interface) for interface in interfaces) / len(interfaces),
+        'retained_bytes_per_node': retained_bytes / len(nodes),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measures memory of parsed nodes and interfaces per node')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000], help='numbers of nodes')
+    args = parser.parse_args()
+
+    print(f'{"nodes":>8} {"interfaces":>11} {"B/Node":>8} {"B/Interface":>12} {"retained B/node":>16}')
+    for node_count in args.sizes:
+        footprint = measure_footprint(node_count)
+        print(f'{footprint["nodes"]:>8} {footprint["interfaces"]:>11} {footprint["node_object_bytes"]:>8.0f} '
+              f'{footprint["interface_object_bytes"]:>12.0f} {footprint["retained_bytes_per_node"]:>16.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+import collections
+import json
+import math
+import os
+import time
+
+
+class BatchMetrics(object):
+    """Operational metrics of a batch conversion.
+
+    Every converted file produces a 'file' event and the end of the run produces a 'batch' event.
+    Events are appended as JSON lines to events_path if it is set.
+    At the end of the run the same counters can be written in the Prometheus text format,
+    e.g. for the node_exporter textfile collector.
+
+    Attributes:
+        LATENCY_BUCKETS (tuple): upper bounds in seconds of the per-file latency histogram
+        events_path (str): path to the JSON lines file with events, None disables events
+    """
+    LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, math.inf)
+    PREFIX = 'eve2gns3'
+
+    def __init__(self, events_path=None):
+        self.events_path = events_path
+        self.files = collections.Counter()
+        self.errors = collections.Counter()
+        self.cache_hits = collections.Counter()
+        self.source_bytes = 0
+        self.nodes = 0
+        self.links = 0
+        self.latency_buckets = [0] * len(self.LATENCY_BUCKETS)
+        self.latency_sum = 0.0
+        self.latency_count = 0
+        self.seconds = 0.0
+        self._events_file = None
+
+    def emit_event(self, event, **values):
+        if self.events_path is None:
+            return
+        if self._events_file is None:
+            directory = os.path.dirname(self.events_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._events_file = open(self.events_path, 'a')
+        values['event'] = event
+        values['timestamp'] = time.time()
+        self._events_file.write(json.dumps(values, sort_keys=True) + '\n')
+        self._events_file.flush()
+
+    def observe_file(self, path, status, seconds, source_bytes=0, nodes=0, links=0, error_type=None):
+        """
+        Records the conversion of one file
+
+        Args:
+            path: string, path of the source file
+            status: string, journal status of the file
+            seconds: float, time spent on the file
+            source_bytes: int, size of the source file
+            nodes: int, number of converted nodes
+            links: int, number of converted links
+            error_type: string, exception type name if the conversion has failed
+
+        Returns:
+            None
+        """
+        self.files[status] += 1
+        self.source_bytes += source_bytes
+        self.nodes += nodes
+        self.links += links
+        if error_type is not None:
+            self.errors[error_type] += 1
+
+        for i, upper_bound in enumerate(self.LATENCY_BUCKETS):
+            if seconds <= upper_bound:
+                self.latency_buckets[i] += 1
+                break
+        self.latency_sum += seconds
+        self.latency_count += 1
+
+        self.emit_event('file', path=path, status=status, seconds=round(seconds, 6), source_bytes=source_bytes,
+                        nodes=nodes, links=links, error_type=error_type)
+
+    def record_cache_hit(self, cache, count=1):
+        """
+        Records that some work was avoided thanks to a cache
+
+        Args:
+            cache: string, name of the cache, e.g. 'journal'
+            count: int, number of hits
+
+        Returns:
+            None
+        """
+        self.cache_hits[cache] += count
+
+    @property
+    def files_per_second(self):
+        return sum(self.files.values()) / self.seconds if self.seconds else 0.0
+
+    @property
+    def bytes_per_second(self):
+        return self.source_bytes / self.seconds if self.seconds else 0.0
+
+    def finish(self, seconds):
+        """
+        Records the end of the batch and emits the 'batch' event
+
+        Args:
+            seconds: float, wall clock duration of the batch
+
+        Returns:
+            None
+        """
+        self.seconds = seconds
+        self.emit_event('batch', seconds=round(seconds, 6),
+                        files=dict(self.files),
+                        files_per_second=self.files_per_second,
+                        bytes_per_second=self.bytes_per_second,
+                        source_bytes=self.source_bytes,
+                        nodes=self.nodes,
+                        links=self.links,
+                        cache_hits=dict(self.cache_hits),
+                        errors=dict(self.errors))
+        if self._events_file is not None:
+            self._events_file.close()
+            self._events_file = None
+
+    def build_prometheus(self):
+        """
+        Renders all metrics in the Prometheus text exposition format
+
+        Returns:
+            string
+        """
+        lines = []
+
+        def add_metric(name, metric_type, help_text, samples):
+            full_name = f'{self.PREFIX}_{name}'
+            lines.append(f'# HELP {full_name} {help_text}')
+            lines.append(f'# TYPE {full_name} {metric_type}')
+            for suffix, labels, value in samples:
+                label_text = ','.join(f'{key}="{label_value}"' for key, label_value in labels)
+                if label_text:
+                    label_text = '{' + label_text + '}'
+                lines.append(f'{full_name}{suffix}{label_text} {value}')
+
+        add_metric('files_total', 'counter', 'Number of processed source files by status',
+                   [('', [('status', status)], count) for status, count in sorted(self.files.items())])
+        add_metric('source_bytes_total', 'counter', 'Size of processed source files in bytes',
+                   [('', [], self.source_bytes)])
+        add_metric('nodes_total', 'counter', 'Number of converted nodes', [('', [], self.nodes)])
+        add_metric('links_total', 'counter', 'Number of converted links', [('', [], self.links)])
+        add_metric('cache_hits_total', 'counter', 'Number of times work was avoided thanks to a cache',
+                   [('', [('cache', cache)], count) for cache, count in sorted(self.cache_hits.items())])
+        add_metric('errors_total', 'counter', 'Number of failed files by exception type',
+                   [('', [('type', error_type)], count) for error_type, count in sorted(self.errors.items())])
+        add_metric('batch_duration_seconds', 'gauge', 'Wall clock duration of the batch', [('', [], self.seconds)])
+        add_metric('files_per_second', 'gauge', 'Batch throughput in files', [('', [], self.files_per_second)])
+        add_metric('bytes_per_second', 'gauge', 'Batch throughput in source bytes', [('', [], self.bytes_per_second)])
+
+        samples = []
+        cumulative_count = 0
+        for upper_bound, count in zip(self.LATENCY_BUCKETS, self.latency_buckets):
+            cumulative_count += count
+            le = '+Inf' if upper_bound == math.inf else str(upper_bound)
+            samples.append(('_bucket', [('le', le)], cumulative_count))
+        samples.append(('_sum', [], self.latency_sum))
+        samples.append(('_count', [], self.latency_count))
+        add_metric('file_duration_seconds', 'histogram', 'Time to convert one source file', samples)
+
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        """
+        Atomically writes the Prometheus text file, so that a collector never reads a partial file
+
+        Args:
+            path: string, destination path, usually ending with .prom
+
+        Returns:
+            None
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w') as f:
+            f.write(self.build_prometheus())
+        os.replace(temp_path, path)
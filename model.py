@@ -0,0 +1,159 @@
+from typing import NamedTuple, Optional, Tuple
+
+import exceptions
+
+
+class InterfaceModel(NamedTuple):
+    eve_id: int
+    name: Optional[str]
+
+
+class NodeModel(NamedTuple):
+    eve_node_id: str
+    name: str
+    node_type: str
+    template: str
+    image_path: str
+    gns_image: str
+    role: Optional[str]
+    eve_coordinates: Tuple[float, float]
+    interfaces: Tuple[InterfaceModel, ...]
+    config: Optional[bytes] = None
+    console_type: Optional[str] = None
+    cpus: Optional[int] = None
+    ram: Optional[int] = None
+    adapters: Optional[int] = None
+    ethernet_adapters_number: Optional[int] = None
+    serial_adapters_number: Optional[int] = None
+
+
+class EndpointModel(NamedTuple):
+    eve_node_id: str
+    eve_interface_id: int
+    interface_name: Optional[str]
+    link_type: str = 'ethernet'
+    adapter_number: Optional[int] = None
+    port_number: Optional[int] = None
+
+
+class LinkModel(NamedTuple):
+    endpoints: Tuple[EndpointModel, ...]
+
+
+class DrawingModel(NamedTuple):
+    eve_coordinates: Tuple[float, float]
+    text: str
+
+
+class LabModel(NamedTuple):
+    """Frozen, output-format neutral representation of a parsed EVE-NG lab.
+
+    It is produced once by Topology after parsing and can be passed to any number of emitters.
+    All containers are tuples, so the model can be shared safely between emitters.
+    """
+    name: str
+    nodes: Tuple[NodeModel, ...]
+    links: Tuple[LinkModel, ...]
+    drawings: Tuple[DrawingModel, ...]
+
+
+def build_node_model(node):
+    """
+    Creates a NodeModel from the Node object
+
+    Args:
+        node: Node object
+
+    Returns:
+        NodeModel object
+    """
+    interfaces = tuple(InterfaceModel(eve_id=interface.eve_id, name=interface.eve_name)
+                       for interface in node.interfaces)
+    return NodeModel(
+        eve_node_id=node.eve_node_id,
+        name=node.name,
+        node_type=node.node_type,
+        template=node.template,
+        image_path=node.image_path,
+        gns_image=node.gns_image,
+        role=node.role,
+        eve_coordinates=node.eve_coordinates.coordinates,
+        interfaces=interfaces,
+        config=node.config,
+        console_type=node.console_type,
+        cpus=node.cpus,
+        ram=node.ram,
+        adapters=node.adapters,
+        ethernet_adapters_number=node.ethernet_adapters_number,
+        serial_adapters_number=node.serial_adapters_number,
+    )
+
+
+def build_link_model(link):
+    """
+    Creates a LinkModel from the Link object
+
+    Args:
+        link: Link object
+
+    Returns:
+        LinkModel object
+    """
+    return LinkModel(endpoints=tuple(build_endpoint_model(interface) for interface in link.interfaces))
+
+
+def build_endpoint_model(interface):
+    """
+    Creates an EndpointModel from the Interface object
+
+    Adapter and port numbers are None if the interface name can't be resolved.
+
+    Args:
+        interface: Interface object
+
+    Returns:
+        EndpointModel object
+    """
+    try:
+        adapter_number, port_number = interface.get_adapter_port_number()
+    except exceptions.InvalidInterfaceName:
+        adapter_number = port_number = None
+    return EndpointModel(
+        eve_node_id=interface.node.eve_node_id,
+        eve_interface_id=interface.eve_id,
+        interface_name=interface.eve_name,
+        link_type='ethernet' if interface.remote_interface is None else 'serial',
+        adapter_number=adapter_number,
+        port_number=port_number,
+    )
+
+
+def build_drawing_model(drawing):
+    """
+    Creates a DrawingModel from the Drawing object
+
+    Args:
+        drawing: Drawing object
+
+    Returns:
+        DrawingModel object
+    """
+    return DrawingModel(eve_coordinates=drawing.eve_coordinates.coordinates, text=drawing.text)
+
+
+def build_lab_model(topology):
+    """
+    Creates a LabModel from the parsed Topology object
+
+    Args:
+        topology: Topology object after parsing
+
+    Returns:
+        LabModel object
+    """
+    return LabModel(
+        name=topology.name,
+        nodes=tuple(build_node_model(node) for node in topology.nodes),
+        links=tuple(build_link_model(link) for link in topology.links),
+        drawings=tuple(build_drawing_model(drawing) for drawing in topology.text_objects),
+    )
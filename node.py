@@ -1,4 +1,3 @@
-import collections
 import os
 import uuid
 import re
@@ -7,6 +6,8 @@ import math
 
 import exceptions
 import json_templates
+import ports
+from config_store import remove_file
 from connections import Link
 from helper import Point, Line, Size
 
@@ -16,8 +17,14 @@ INTERFACE_NAME_RE = re.compile(r'(?P<base_name>[a-zA-Z]+)(?P<adapter_number>\d+)
 
 class Node(object):
     """
-    TODO
-    @DynamicAttrs
+    A device in the topology.
+
+    Instances use __slots__, so only declared attributes can be set. There is a single class for all node types,
+    its slots are the union of COMMON_FIELDS and NODE_TYPE_FIELDS of every type: NODE_TYPE_FIELDS only tells
+    which fields are parsed for a type, fields of other types stay None.
+    Per-type classes are not possible, because a node created as a remote end of a serial link exists
+    before its type is known and has only eve_node_id and topology until from_dict parses it.
+    python3 memory_footprint.py reports the memory per Node and Interface object.
     """
     L2_IOL_LABEL_COORDINATES = Point(-4, 46)
     L3_IOL_LABEL_COORDINATES = Point(15, 46)
@@ -25,27 +32,31 @@ class Node(object):
     SWITCH_SYMBOL_SIZE = Size(51, 48)
     ROUTER_SYMBOL_SIZE = Size(66, 45)
 
-    def __init__(self, interfaces_dict=None, **kwargs):
+    COMMON_FIELDS = ('eve_node_id', 'name', 'node_type', 'template', 'image_path', 'eve_icon', 'eve_coordinates')
+    NODE_TYPE_FIELDS = {
+        'iol': ('ethernet_adapters_number', 'serial_adapters_number'),
+        'qemu': ('console_type', 'cpus', 'ram', 'adapters'),
+    }
+    PARSED_FIELDS = COMMON_FIELDS + NODE_TYPE_FIELDS['iol'] + NODE_TYPE_FIELDS['qemu']
+
+    __slots__ = PARSED_FIELDS + ('topology', 'uuid', 'config', 'compute_id', 'console_port', 'interfaces',
+                                 'id_to_interface')
+
+    def __init__(self, interfaces_dict=None, topology=None, **kwargs):
         self.uuid = uuid.uuid4()
+        self.topology = topology
 
+        for attr_name in self.PARSED_FIELDS:
+            setattr(self, attr_name, None)
         for attr_name, attr_value in kwargs.items():
             setattr(self, attr_name, attr_value)
 
-        # self.eve_node_id = eve_node_id
-        # self.name = name
-        # self.node_type = node_type
-        # self.image_path = image_path
-        # self.eve_icon = eve_icon
-        # self.eve_coordinates = eve_coordinates
-        #
-        # self.serial_adapters_number = serial_adapters_number
-        # self.ethernet_adapters_number = ethernet_adapters_number
-
         self.config = None
+        self.compute_id = None
+        self.console_port = None
         self.interfaces = []
         self.id_to_interface = {}
 
-        # self.topology = topology
         self.topology.id_to_node[self.eve_node_id] = self
 
         if interfaces_dict is not None:
@@ -264,16 +275,21 @@ class Node(object):
         self.interfaces.append(interface)
         return interface
 
+    @property
+    def port_table(self):
+        """Interface name to (adapter, port) mapping, shared by all nodes with the same template and adapters"""
+        return ports.get_port_table(self)
+
     @property
     def gns_coordinates(self):
         return self.topology.get_gns_coordinates(self.eve_coordinates)
 
     @property
     def gns_image(self):
-        if self.node_type == 'iol' and self.role == 'switch' and self.topology.args.l2_iol_image:
-            return self.topology.args.l2_iol_image
-        elif self.node_type == 'iol' and self.role == 'router' and self.topology.args.l3_iol_image:
-            return self.topology.args.l3_iol_image
+        if self.node_type == 'iol' and self.role == 'switch' and self.topology.options.l2_iol_image:
+            return self.topology.options.l2_iol_image
+        elif self.node_type == 'iol' and self.role == 'router' and self.topology.options.l3_iol_image:
+            return self.topology.options.l3_iol_image
         else:
             return self.image_path
 
@@ -304,6 +320,10 @@ class Node(object):
     def gns_icon_center_coordinates(self):
         return self.gns_coordinates + self.gns_icon_size / 2
 
+    @property
+    def config_filename(self):
+        return f'{self.name}_startup-config.cfg'
+
     def write_config_to_dir(self, dst_dir):
         """
         Creates a config file for the node in the specified directory on disk
@@ -312,13 +332,16 @@ class Node(object):
             dst_dir: string, destination directory where the file should be written
 
         Returns:
-            None
+            string, path to the written file or None if the node has no config
         """
         if self.config:
-            filename = f'{self.name}_startup-config.cfg'
-            path = os.path.join(dst_dir, filename)
+            path = os.path.join(dst_dir, self.config_filename)
+            if self.topology.config_store is not None:
+                return self.topology.config_store.write(self.config, path)
+            remove_file(path)
             with open(path, 'wb') as f:
                 f.write(self.config)
+            return path
 
     def build_gns_topology_json(self):
         if self.node_type == 'iol':
@@ -332,19 +355,22 @@ class Node(object):
             node_json['properties']['cpus'] = self.cpus
             node_json['properties']['ram'] = self.ram
             node_json['properties']['hda_disk_image'] = self.gns_image
+            port_name_format, port_segment_size = ports.get_qemu_port_naming(self.template)
+            node_json['port_name_format'] = port_name_format
+            if port_segment_size:
+                node_json['properties']['port_segment_size'] = port_segment_size
             if self.template == 'vios':
-                node_json['port_name_format'] = 'Gi0/{0}'
                 node_json['properties']['hdb_disk_image'] = 'IOSv_startup_config.img'
                 node_json['properties']['hdb_disk_interface'] = 'virtio'
-            elif self.template == 'viosl2':
-                node_json['port_name_format'] = 'Gi{1}/{0}'
-                node_json['properties']['port_segment_size'] = 4
-            else:
-                node_json['port_name_format'] = 'Gi0/{0}'
         else:
             raise NotImplementedError("There is no template for the node type {self.node_type}")
 
-        node_json['console'] = self.topology.console_start_port + int(self.eve_node_id)
+        if self.compute_id is not None:
+            node_json['compute_id'] = self.compute_id
+        if self.console_port is not None:
+            node_json['console'] = self.console_port
+        else:
+            node_json['console'] = self.topology.console_start_port + int(self.eve_node_id)
         node_json['label']['text'] = self.name
         node_json['name'] = self.name
         node_json['node_id'] = str(self.uuid)
@@ -365,6 +391,8 @@ class Node(object):
 
 
 class Interface(object):
+    __slots__ = ('eve_id', 'eve_name', 'eve_network', 'node', 'link', 'remote_node', 'remote_interface')
+
     def __init__(self, eve_id, eve_name, eve_network=None, node=None,
                  remote_node=None, remote_interface=None):
         self.eve_id = eve_id
@@ -381,8 +409,27 @@ class Interface(object):
         return f'Interface(eve_id={self.eve_id}, eve_name={self.eve_name}, node={self.node})'
 
     def get_adapter_port_number(self):
-        if self.node.node_type == 'iol':
-            parsed_values = INTERFACE_NAME_RE.match(self.eve_name).groupdict()
-            return int(parsed_values['adapter_number']), int(parsed_values['port_number'])
-        else:
-            raise NotImplementedError('This method is valid only for IOL devices')
+        """
+        Resolves the interface name to GNS3 adapter and port numbers using the port table of the node
+
+        Returns:
+            tuple (adapter number, port number)
+
+        Raises:
+            exceptions.InvalidInterfaceName if the name of an IOL interface can't be resolved
+        """
+        if self.eve_name is not None:
+            try:
+                return self.node.port_table[self.eve_name.lower()]
+            except KeyError:
+                pass
+
+        if self.node.node_type == 'qemu':
+            # QEMU interface IDs in EVE-NG are adapter numbers
+            return self.eve_id, 0
+        match = INTERFACE_NAME_RE.match(self.eve_name or '')
+        if match is None:
+            raise exceptions.InvalidInterfaceName(
+                f'Can\'t resolve interface name {self.eve_name} on node {self.node.name}'
+            )
+        return int(match.group('adapter_number')), int(match.group('port_number'))
@@ -0,0 +1,52 @@
+import os
+from typing import NamedTuple, Optional, Tuple
+
+from config_store import CONFIG_STORE_DIRNAME
+from placement import Compute
+
+
+class ConversionOptions(NamedTuple):
+    """Options of the conversion of one lab, read by Topology, Node and emitters.
+
+    The options are immutable, so one object can be shared by any number of conversions, also between threads.
+    Defaults are the same as defaults of the command line arguments.
+
+    Attributes:
+        console_start_port (int): console port of a node is console_start_port + EVE node ID
+        l2_iol_image (str): GNS3 image path of L2 IOL nodes if it differs from EVE-NG
+        l3_iol_image (str): GNS3 image path of L3 IOL nodes if it differs from EVE-NG
+        computes (tuple): Compute objects to distribute nodes between, all nodes are on the vm compute if empty
+        update (bool): patch an existing GNS3 project instead of overwriting it, only used when writing to disk
+        config_store_dir (str): directory of the content-addressed config store, configs are written
+            to the project directly if None, only used when writing to disk
+        workers (int): number of forked worker processes for text object parsing and JSON building
+            of large labs, the output does not depend on it, api.convert always uses a single process
+    """
+    console_start_port: int = 5000
+    l2_iol_image: Optional[str] = None
+    l3_iol_image: Optional[str] = None
+    computes: Tuple[Compute, ...] = ()
+    update: bool = False
+    config_store_dir: Optional[str] = None
+    workers: int = 1
+
+    @classmethod
+    def from_args(cls, args):
+        """
+        Creates options from parsed command line arguments
+
+        Args:
+            args: parsed command line arguments
+
+        Returns:
+            ConversionOptions object
+        """
+        return cls(
+            console_start_port=args.console_start_port,
+            l2_iol_image=args.l2_iol_image,
+            l3_iol_image=args.l3_iol_image,
+            computes=tuple(args.computes or ()),
+            update=args.update,
+            config_store_dir=os.path.join(args.dst_dir, CONFIG_STORE_DIRNAME) if args.dedup_configs else None,
+            workers=args.workers,
+        )
@@ -0,0 +1,51 @@
+import multiprocessing
+import os
+
+
+# below this number of items the work is done in the calling process, starting workers would cost more
+PARALLEL_MIN_ITEMS = 64
+
+_worker_state = None
+
+
+def _set_worker_state(state):
+    global _worker_state
+    _worker_state = state
+
+
+def _call_chunk(chunk):
+    function, items = chunk
+    return [function(_worker_state, item) for item in items]
+
+
+def ordered_map(function, items, workers=1, state=None):
+    """
+    Applies the function to all items in a pool of worker processes, results are in the order of items
+
+    Workers are forked, so they get a copy of state (e.g. a parsed Topology) without pickling it
+    and only items and results are sent between processes. It pays off only if the work per item is much more
+    expensive than pickling the item and the result. Without fork support, with a single worker or CPU
+    or with few items, the function is applied in the calling process, the result is the same.
+    A fork copies only the calling thread, so it must not be used in a process with other running threads.
+
+    Args:
+        function: module level function function(state, item), it must not rely on changes made in workers
+        items: list of picklable items
+        workers: int, number of worker processes, it is limited to the number of CPUs
+        state: any object passed to every call of the function
+
+    Returns:
+        list of results
+    """
+    items = list(items)
+    workers = min(workers, os.cpu_count() or 1)
+    if workers <= 1 or len(items) < PARALLEL_MIN_ITEMS or 'fork' not in multiprocessing.get_all_start_methods():
+        return [function(state, item) for item in items]
+
+    # a few chunks per worker even out the differences between chunks
+    chunk_size = -(-len(items) // (workers * 4))
+    chunks = [(function, items[i:i + chunk_size]) for i in range(0, len(items), chunk_size)]
+    context = multiprocessing.get_context('fork')
+    with context.Pool(min(workers, len(chunks)), initializer=_set_worker_state, initargs=(state,)) as pool:
+        results = pool.map(_call_chunk, chunks, chunksize=1)
+    return [result for chunk_results in results for result in chunk_results]
@@ -0,0 +1,239 @@
+import argparse
+import collections
+import json
+
+import exceptions
+import json_templates
+
+
+BALANCE_TOLERANCE = 0.1
+REFINEMENT_PASSES = 8
+
+
+class Compute(object):
+    """A GNS3 compute host with its capacity.
+
+    Attributes:
+        compute_id (str): compute ID used in GNS3 topology files
+        name (str): name of the compute shown in GNS3
+        host (str): IP address or host name of the compute
+        port (int): TCP port of the GNS3 server on the compute
+        protocol (str): http or https
+        cpus (int): number of CPUs available to nodes
+        ram (int): RAM available to nodes in MB
+    """
+    def __init__(self, compute_id, cpus, ram, name=None, host=None, port=3080, protocol='http'):
+        self.compute_id = compute_id
+        self.name = name or compute_id
+        self.host = host
+        self.port = port
+        self.protocol = protocol
+        self.cpus = cpus
+        self.ram = ram
+
+    def __repr__(self):
+        return f'Compute(compute_id={self.compute_id}, cpus={self.cpus}, ram={self.ram})'
+
+    def build_gns_topology_json(self):
+        return {
+            'compute_id': self.compute_id,
+            'host': self.host,
+            'name': self.name,
+            'port': self.port,
+            'protocol': self.protocol,
+        }
+
+
+def load_computes(path):
+    """
+    Loads compute hosts from a JSON file, it is used as argparse type
+
+    Args:
+        path: string, path to a JSON file with a list of objects having at least compute_id, cpus and ram keys
+
+    Returns:
+        list of Compute objects
+
+    Raises:
+        argparse.ArgumentTypeError if the file is not valid
+    """
+    try:
+        with open(path) as f:
+            computes = [Compute(**compute_dict) for compute_dict in json.load(f)]
+    except (OSError, ValueError, TypeError) as e:
+        raise argparse.ArgumentTypeError(f'can\'t load computes from {path}: {e}')
+    if not computes:
+        raise argparse.ArgumentTypeError(f'no computes are defined in {path}')
+    return computes
+
+
+def get_node_footprint(node):
+    """
+    Gets resources which the node consumes on a compute
+
+    Args:
+        node: Node object
+
+    Returns:
+        tuple (cpus, ram in MB)
+    """
+    if node.node_type == 'qemu':
+        return node.cpus, node.ram
+    # IOL nodes are single-threaded processes, RAM is set by the GNS3 template
+    iol_properties = json_templates.IOL_JSON_TEMPLATE['properties']
+    return 1, iol_properties['ram'] + iol_properties['nvram'] // 1024
+
+
+class Placement(object):
+    """Assignment of nodes to compute hosts balancing CPU/RAM and minimizing links between hosts.
+
+    The initial assignment grows one partition per compute from breadth-first traversal of the topology graph,
+    so connected nodes tend to be on the same host. Then a few Fiduccia-Mattheyses style refinement passes move
+    nodes to the host where most of their neighbours are, if it does not break the balance.
+    Every pass is O(nodes + links), so this scales to labs with thousands of nodes.
+
+    Attributes:
+        computes (list): Compute objects
+        node_to_compute (dict): Node object to index of the compute
+
+    Raises:
+        exceptions.InsufficientComputeCapacity if the nodes need more CPUs or RAM than all computes have together,
+            run raises it if a node does not fit on any compute, e.g. it is bigger than the free space of every compute
+    """
+    def __init__(self, nodes, links, computes):
+        self.nodes = list(nodes)
+        self.computes = computes
+        self.adjacency = collections.defaultdict(list)
+        for link in links:
+            if link.node1 is not link.node2:
+                self.adjacency[link.node1].append(link.node2)
+                self.adjacency[link.node2].append(link.node1)
+
+        self.footprint = {node: get_node_footprint(node) for node in self.nodes}
+        total_cpus = sum(cpus for cpus, _ in self.footprint.values())
+        total_ram = sum(ram for _, ram in self.footprint.values())
+        capacity_cpus = sum(compute.cpus for compute in computes)
+        capacity_ram = sum(compute.ram for compute in computes)
+        # every compute gets the same share of its capacity, allowing a small imbalance
+        target_utilization = max(total_cpus / capacity_cpus, total_ram / capacity_ram)
+        if target_utilization > 1:
+            raise exceptions.InsufficientComputeCapacity(
+                f'nodes need {total_cpus} CPUs and {total_ram} MB RAM, but computes have only '
+                f'{capacity_cpus} CPUs and {capacity_ram} MB RAM ({target_utilization:.0%} utilization)'
+            )
+        self.target_utilization = target_utilization
+        # a compute is never filled past its capacity, the tolerance only applies below it
+        self.max_utilization = min(target_utilization * (1 + BALANCE_TOLERANCE), 1)
+
+        self.used_cpus = [0] * len(computes)
+        self.used_ram = [0] * len(computes)
+        self.node_to_compute = {}
+
+    def utilization(self, compute_index, node=None):
+        """Utilization of the compute, optionally after adding the node to it"""
+        cpus, ram = self.footprint[node] if node is not None else (0, 0)
+        compute = self.computes[compute_index]
+        return max((self.used_cpus[compute_index] + cpus) / compute.cpus,
+                   (self.used_ram[compute_index] + ram) / compute.ram)
+
+    def assign(self, node, compute_index):
+        previous_index = self.node_to_compute.get(node)
+        cpus, ram = self.footprint[node]
+        if previous_index is not None:
+            self.used_cpus[previous_index] -= cpus
+            self.used_ram[previous_index] -= ram
+        self.used_cpus[compute_index] += cpus
+        self.used_ram[compute_index] += ram
+        self.node_to_compute[node] = compute_index
+
+    def bfs_order(self):
+        visited = set()
+        # nodes with most links first, ties are broken by the node order to stay deterministic
+        for start_node in sorted(self.nodes, key=lambda node: -len(self.adjacency[node])):
+            if start_node in visited:
+                continue
+            visited.add(start_node)
+            queue = collections.deque([start_node])
+            while queue:
+                node = queue.popleft()
+                yield node
+                for neighbour in self.adjacency[node]:
+                    if neighbour not in visited:
+                        visited.add(neighbour)
+                        queue.append(neighbour)
+
+    def find_compute_with_space(self, node):
+        """
+        Finds the compute which is the least utilized after adding the node, among those where the node fits
+
+        Raises:
+            exceptions.InsufficientComputeCapacity if the node does not fit on any compute
+        """
+        utilization, compute_index = min((self.utilization(i, node), i) for i in range(len(self.computes)))
+        if utilization > 1:
+            cpus, ram = self.footprint[node]
+            raise exceptions.InsufficientComputeCapacity(
+                f'node {node.name} needs {cpus} CPUs and {ram} MB RAM, but no compute has that much left'
+            )
+        return compute_index
+
+    def grow_partitions(self):
+        # partitions are filled up to the target only, the tolerance is left for the refinement
+        compute_index = 0
+        for node in self.bfs_order():
+            while (compute_index < len(self.computes) - 1 and self.used_cpus[compute_index]
+                   and self.utilization(compute_index, node) > self.target_utilization):
+                compute_index += 1
+            if self.utilization(compute_index, node) > 1:
+                self.assign(node, self.find_compute_with_space(node))
+            else:
+                self.assign(node, compute_index)
+
+    def refine(self):
+        """
+        Moves nodes to the compute of most of their neighbours while the balance allows it
+
+        Returns:
+            int, number of moved nodes
+        """
+        moved = 0
+        for node in self.nodes:
+            current_index = self.node_to_compute[node]
+            neighbour_counts = collections.Counter(self.node_to_compute[neighbour]
+                                                   for neighbour in self.adjacency[node])
+            for compute_index, count in neighbour_counts.most_common():
+                if count <= neighbour_counts[current_index]:
+                    break
+                if self.utilization(compute_index, node) <= self.max_utilization:
+                    self.assign(node, compute_index)
+                    moved += 1
+                    break
+        return moved
+
+    def run(self):
+        """
+        Places all nodes, no compute is utilized above 100%
+
+        Returns:
+            dictionary, where key is Node object and value is Compute object
+
+        Raises:
+            exceptions.InsufficientComputeCapacity if a node does not fit on any compute
+        """
+        self.grow_partitions()
+        for _ in range(REFINEMENT_PASSES):
+            if not self.refine():
+                break
+        return {node: self.computes[compute_index] for node, compute_index in self.node_to_compute.items()}
+
+    def report(self):
+        """Utilization of every compute and the cut size, e.g. to be printed after the placement"""
+        utilization = ', '.join(f'{compute.compute_id}: {self.utilization(i):.0%}'
+                                for i, compute in enumerate(self.computes))
+        return f'{len(self.computes)} computes ({utilization}), {self.cut_size} links between computes'
+
+    @property
+    def cut_size(self):
+        """Number of links between nodes on different computes"""
+        return sum(1 for node, neighbours in self.adjacency.items() for neighbour in neighbours
+                   if self.node_to_compute[node] != self.node_to_compute[neighbour]) // 2
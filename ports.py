@@ -0,0 +1,121 @@
+import functools
+
+
+IOL_PORTS_PER_ADAPTER = 4
+
+# GNS3 port naming of QEMU templates: port_name_format and port_segment_size
+QEMU_PORT_NAMING = {
+    'vios': ('Gi0/{0}', 0),
+    'viosl2': ('Gi{1}/{0}', 4),
+}
+DEFAULT_QEMU_PORT_NAMING = ('Gi0/{0}', 0)
+
+# interface names in EVE-NG may be short or long, both resolve to the same port
+NAME_PREFIX_ALIASES = {
+    'e': ('ethernet', 'eth'),
+    's': ('serial',),
+    'gi': ('gigabitethernet',),
+}
+
+
+def get_qemu_port_naming(template):
+    """
+    Gets GNS3 port naming of a QEMU template
+
+    Args:
+        template: string, EVE-NG template name, e.g. vios
+
+    Returns:
+        tuple (port_name_format, port_segment_size)
+    """
+    return QEMU_PORT_NAMING.get(template, DEFAULT_QEMU_PORT_NAMING)
+
+
+def format_port_name(port_name_format, port_number, segment_number):
+    """Formats a port name the same way as GNS3 does, supporting both positional and named fields"""
+    return port_name_format.format(port_number, segment_number,
+                                   port0=port_number, port1=port_number + 1,
+                                   segment0=segment_number, segment1=segment_number + 1)
+
+
+def _add_name(table, name, adapter_port):
+    name = name.lower()
+    table[name] = adapter_port
+    for short_prefix, long_prefixes in NAME_PREFIX_ALIASES.items():
+        suffix = name[len(short_prefix):]
+        if name.startswith(short_prefix) and suffix[:1].isdigit():
+            for long_prefix in long_prefixes:
+                table[long_prefix + suffix] = adapter_port
+
+
+@functools.lru_cache(maxsize=None)
+def build_iol_port_table(ethernet_adapters_number, serial_adapters_number):
+    """
+    Builds interface name to (adapter, port) mapping of an IOL node
+
+    Ethernet adapters go first, serial adapters continue the numbering, every adapter has 4 ports:
+    with 1 ethernet and 1 serial adapter the interfaces are e0/0-e0/3 and s1/0-s1/3.
+    Tables are cached, so all nodes with the same adapter numbers share one table.
+
+    Args:
+        ethernet_adapters_number: int
+        serial_adapters_number: int
+
+    Returns:
+        dictionary, where key is lower case interface name and value is tuple (adapter number, port number)
+    """
+    table = {}
+    for adapter_number in range(ethernet_adapters_number + serial_adapters_number):
+        prefix = 'e' if adapter_number < ethernet_adapters_number else 's'
+        for port_number in range(IOL_PORTS_PER_ADAPTER):
+            _add_name(table, f'{prefix}{adapter_number}/{port_number}', (adapter_number, port_number))
+    return table
+
+
+@functools.lru_cache(maxsize=None)
+def build_qemu_port_table(template, adapters):
+    """
+    Builds interface name to (adapter, port) mapping of a QEMU node from the port naming of its template
+
+    Every QEMU adapter has a single port. With a segment size, adapters are split into segments,
+    e.g. viosl2 adapter 5 is Gi1/1.
+    Only templates listed in QEMU_PORT_NAMING get a table. For other templates the first NIC is not
+    necessarily Gi0/0 (e.g. asav Gi0/0 is adapter 1 after Management0/0), so their interfaces
+    keep using EVE interface IDs as adapter numbers.
+
+    Args:
+        template: string, EVE-NG template name
+        adapters: int, number of adapters
+
+    Returns:
+        dictionary, where key is lower case interface name and value is tuple (adapter number, port number),
+        empty if the port naming of the template is not known
+    """
+    if template not in QEMU_PORT_NAMING:
+        return {}
+    port_name_format, port_segment_size = QEMU_PORT_NAMING[template]
+    table = {}
+    for adapter_number in range(adapters):
+        if port_segment_size:
+            port_number, segment_number = adapter_number % port_segment_size, adapter_number // port_segment_size
+        else:
+            port_number, segment_number = adapter_number, 0
+        _add_name(table, format_port_name(port_name_format, port_number, segment_number), (adapter_number, 0))
+    return table
+
+
+def get_port_table(node):
+    """
+    Gets the shared interface name resolution table of the node
+
+    Args:
+        node: Node object
+
+    Returns:
+        dictionary, where key is lower case interface name and value is tuple (adapter number, port number)
+    """
+    if node.node_type == 'iol':
+        return build_iol_port_table(node.ethernet_adapters_number, node.serial_adapters_number)
+    elif node.node_type == 'qemu':
+        return build_qemu_port_table(node.template, node.adapters)
+    return {}
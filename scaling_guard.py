@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""Guards the conversion pipeline against super-linear regressions.
+
+Generates synthetic labs of growing size, measures time and allocated memory of every Topology stage
+and fits the growth exponent k of cost ~ n^k with least squares on a log-log scale.
+The script exits with code 1 if any stage grows faster than --max_exponent, which by default
+allows n log n (local exponent about 1.1-1.2 between 100 and 10000 nodes) with some noise margin.
+
+Example:
+    python3 scaling_guard.py --sizes 100 1000 10000
+
+tests/test_scaling.py runs the same check at smaller sizes as part of the tests.
+"""
+import argparse
+import base64
+import functools
+import gc
+import math
+import sys
+import time
+import tracemalloc
+
+import xmltodict
+
+from options import ConversionOptions
+from placement import Compute
+from topology import Topology
+
+
+STAGES = ('xml', 'parse_networks', 'parse_nodes', 'parse_configs', 'parse_text_objects',
+          'create_links_from_networks', 'calculate_gns_canvas_size', 'place_nodes', 'build_gns_topology_dict',
+          'model')
+COMPUTE_COUNT = 4
+# below this duration in seconds at the largest size the measurement is dominated by noise
+MIN_MEASURABLE_SECONDS = 0.005
+MIN_MEASURABLE_BYTES = 64 * 1024
+
+
+def generate_lab(node_count):
+    """
+    Generates a *.unl lab: a chain of IOL and vIOS nodes connected with ethernet networks,
+    serial links between pairs of IOL nodes, configs for half of the nodes and one text object per 20 nodes
+
+    Args:
+        node_count: int, number of nodes
+
+    Returns:
+        string, content of the *.unl file
+    """
+    lines = ['<?xml version="1.0" encoding="UTF-8" standalone="yes"?>',
+             f'<lab name="scale-{node_count}" version="1">', '<topology>', '<nodes>']
+    for node_id in range(1, node_count + 1):
+        left, top = (node_id % 100) * 20, (node_id // 100) * 20
+        if node_id % 3 == 0:
+            lines.append(f'<node id="{node_id}" name="vIOS{node_id}" type="qemu" template="vios" image="vios-15.6" '
+                         f'console="telnet" cpu="1" ram="512" ethernet="4" icon="Router.png" '
+                         f'left="{left}" top="{top}">')
+            interface_names = ('Gi0/0', 'Gi0/1')
+        else:
+            lines.append(f'<node id="{node_id}" name="R{node_id}" type="iol" template="iol" image="L3.bin" '
+                         f'ethernet="1" serial="1" icon="Router.png" left="{left}" top="{top}">')
+            interface_names = ('e0/0', 'e0/1')
+            # IOL nodes 1-2, 4-5, ... are connected with a serial link as well
+            if node_id % 3 == 1 and node_id + 1 <= node_count:
+                lines.append(f'<interface id="16" name="s1/0" type="serial" remote_id="{node_id + 1}" remote_if="16"/>')
+            elif node_id % 3 == 2:
+                lines.append(f'<interface id="16" name="s1/0" type="serial" remote_id="{node_id - 1}" remote_if="16"/>')
+        if node_id > 1:
+            lines.append(f'<interface id="0" name="{interface_names[0]}" type="ethernet" network_id="{node_id}"/>')
+        if node_id < node_count:
+            lines.append(f'<interface id="1" name="{interface_names[1]}" type="ethernet" '
+                         f'network_id="{node_id + 1}"/>')
+        lines.append('</node>')
+    lines.append('</nodes>')
+    lines.append('<networks>')
+    for network_id in range(2, node_count + 1):
+        lines.append(f'<network id="{network_id}" type="bridge" name="Net{network_id}"/>')
+    lines.append('</networks>')
+    lines.append('</topology>')
+
+    lines.append('<objects>')
+    lines.append('<textobjects>')
+    for text_id in range(1, max(2, node_count // 20) + 1):
+        html = f'<div style="left: {text_id * 10}px; top: {text_id}px;">Area {text_id}<br>text</div>'
+        lines.append(f'<textobject id="{text_id}" name="txt {text_id}" type="text">'
+                     f'<data>{base64.b64encode(html.encode()).decode()}</data></textobject>')
+    lines.append('</textobjects>')
+    lines.append('<configs>')
+    for node_id in range(1, node_count + 1, 2):
+        config = f'hostname N{node_id}\n' + 'interface Loopback0\n ip address 10.0.0.1 255.255.255.255\n' * 5
+        lines.append(f'<config id="{node_id}">{base64.b64encode(config.encode()).decode()}</config>')
+    lines.append('</configs>')
+    lines.append('</objects>')
+    lines.append('</lab>')
+    return '\n'.join(lines)
+
+
+def generate_computes(node_count, compute_count=COMPUTE_COUNT):
+    """
+    Generates computes which can hold a lab from generate_lab at about 50% utilization
+
+    Args:
+        node_count: int, number of nodes
+        compute_count: int, number of computes
+
+    Returns:
+        tuple of Compute objects
+    """
+    cpus = -(-2 * node_count // compute_count)
+    return tuple(Compute(f'compute{i}', cpus=cpus, ram=cpus * 1024) for i in range(compute_count))
+
+
+class StageProfiler(object):
+    """Wraps Topology methods and xmltodict.parse to collect time or allocations per stage"""
+    def __init__(self, measure_memory=False):
+        self.measure_memory = measure_memory
+        self.results = {}
+        self._originals = []
+
+    def _wrap(self, owner, attribute_name, stage):
+        original = getattr(owner, attribute_name)
+
+        @functools.wraps(original)
+        def wrapper(*args, **kwargs):
+            if self.measure_memory:
+                tracemalloc.reset_peak()
+                start = tracemalloc.get_traced_memory()[0]
+                result = original(*args, **kwargs)
+                self.results[stage] = self.results.get(stage, 0) + tracemalloc.get_traced_memory()[1] - start
+            else:
+                start = time.perf_counter()
+                result = original(*args, **kwargs)
+                self.results[stage] = self.results.get(stage, 0) + time.perf_counter() - start
+            return result
+
+        self._originals.append((owner, attribute_name, original))
+        setattr(owner, attribute_name, wrapper)
+
+    def __enter__(self):
+        self._wrap(xmltodict, 'parse', 'xml')
+        for stage in STAGES[1:-1]:
+            self._wrap(Topology, stage, stage)
+        if self.measure_memory:
+            tracemalloc.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.measure_memory:
+            tracemalloc.stop()
+        for owner, attribute_name, original in reversed(self._originals):
+            setattr(owner, attribute_name, original)
+
+
+def profile_conversion(eve_xml, measure_memory=False, workers=1, computes=()):
+    """
+    Converts the lab in memory and measures every stage
+
+    The garbage collector is disabled like in timeit, otherwise a collection triggered in one stage adds
+    the time of collecting the objects of all stages to it and frees memory allocated by earlier stages.
+
+    Args:
+        eve_xml: string, content of the *.unl file
+        measure_memory: boolean, measure allocated bytes instead of seconds
+        workers: int, number of worker processes of the conversion
+        computes: tuple of Compute objects, place_nodes is measured only if computes are specified
+
+    Returns:
+        dictionary, stage to seconds or bytes mapping
+    """
+    gc.collect()
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with StageProfiler(measure_memory) as profiler:
+            topology = Topology(eve_xml, ConversionOptions(workers=workers, computes=computes))
+            topology.build_gns_topology_dict()
+            if measure_memory:
+                tracemalloc.reset_peak()
+                start = tracemalloc.get_traced_memory()[0]
+                topology.model
+                profiler.results['model'] = tracemalloc.get_traced_memory()[1] - start
+            else:
+                start = time.perf_counter()
+                topology.model
+                profiler.results['model'] = time.perf_counter() - start
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return profiler.results
+
+
+def fit_exponent(sizes, values):
+    """
+    Fits k in value = c * size^k with least squares on log-log scale
+
+    Returns:
+        float, the exponent k
+    """
+    points = [(math.log(size), math.log(value)) for size, value in zip(sizes, values) if value > 0]
+    if len(points) < 2:
+        return 0.0
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+
+
+def measure_scaling(sizes, repeat=3, workers=1):
+    """
+    Profiles conversions of generated labs of all sizes, the labs are placed on generated computes
+
+    Args:
+        sizes: sorted list of numbers of nodes
+        repeat: int, number of timing runs per size, the fastest one is used
+        workers: int, number of worker processes of the conversion
+
+    Returns:
+        tuple of dictionaries (stage to list of seconds, stage to list of allocated bytes), one value per size
+    """
+    timings = {stage: [] for stage in STAGES}
+    allocations = {stage: [] for stage in STAGES}
+    for size in sizes:
+        eve_xml = generate_lab(size)
+        computes = generate_computes(size)
+        runs = []
+        for _ in range(repeat):
+            runs.append(profile_conversion(eve_xml, workers=workers, computes=computes))
+        memory = profile_conversion(eve_xml, measure_memory=True, workers=workers, computes=computes)
+        for stage in STAGES:
+            timings[stage].append(min(run[stage] for run in runs))
+            allocations[stage].append(memory[stage])
+    return timings, allocations
+
+
+def check_stage(sizes, stage_timings, stage_allocations, max_exponent):
+    """
+    Checks the growth of time and memory of one stage, values too small to be measured reliably are ignored
+
+    Returns:
+        tuple (time exponent, memory exponent, list of failed measures: 'time' and/or 'memory')
+    """
+    time_exponent = fit_exponent(sizes, stage_timings)
+    memory_exponent = fit_exponent(sizes, stage_allocations)
+    verdicts = []
+    if stage_timings[-1] >= MIN_MEASURABLE_SECONDS and time_exponent > max_exponent:
+        verdicts.append('time')
+    if stage_allocations[-1] >= MIN_MEASURABLE_BYTES and memory_exponent > max_exponent:
+        verdicts.append('memory')
+    return time_exponent, memory_exponent, verdicts
+
+
+def get_arguments():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000],
+                        help='specify numbers of nodes of generated labs, default is 100 1000 10000')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='specify number of timing runs per size, the fastest one is used, default is 3')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='specify number of worker processes of the conversion, default is 1')
+    parser.add_argument('--max_exponent', type=float, default=1.3,
+                        help='specify maximum allowed growth exponent of every stage, default is 1.3')
+    return parser.parse_args()
+
+
+def main():
+    args = get_arguments()
+    sizes = sorted(args.sizes)
+    timings, allocations = measure_scaling(sizes, args.repeat, args.workers)
+
+    failed = False
+    print(f'{"stage":<28}' + ''.join(f'{size:>12}' for size in sizes) + f'{"time k":>9}{"memory k":>10}')
+    for stage in STAGES:
+        time_exponent, memory_exponent, verdicts = check_stage(sizes, timings[stage], allocations[stage],
+                                                               args.max_exponent)
+        failed = failed or bool(verdicts)
+        print(f'{stage:<28}' + ''.join(f'{seconds * 1000:>10.1f}ms' for seconds in timings[stage]) +
+              f'{time_exponent:>9.2f}{memory_exponent:>10.2f}' +
+              (f'  FAIL: {", ".join(verdicts)} grows faster than n^{args.max_exponent}' if verdicts else ''))
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+import collections
+import xml.sax
+import xml.sax.handler
+
+
+class LabStats(object):
+    """Aggregated inventory counters of one or several labs.
+
+    Attributes:
+        name (str): lab name, None for aggregated stats
+        path (str): path to the source file, None for aggregated stats
+        nodes (int): number of nodes
+        links (int): number of point-to-point links, both ethernet and serial
+        multi_access_networks (int): number of networks with more than two members, these can't be converted yet
+        ram (int): total RAM of all nodes in MB
+        cpus (int): total number of CPUs of all nodes
+        node_types (Counter): number of nodes per node type (iol, qemu)
+        templates (Counter): number of nodes per template (iol, vios, viosl2)
+        images (Counter): number of nodes per image path
+    """
+    def __init__(self, name=None, path=None):
+        self.name = name
+        self.path = path
+        self.labs = 0 if path is None else 1
+        self.nodes = 0
+        self.links = 0
+        self.multi_access_networks = 0
+        self.ram = 0
+        self.cpus = 0
+        self.node_types = collections.Counter()
+        self.templates = collections.Counter()
+        self.images = collections.Counter()
+
+    def add_node(self, node_type, template, image, ram=None, cpus=None):
+        self.nodes += 1
+        self.node_types[node_type] += 1
+        self.templates[template] += 1
+        self.images[image] += 1
+        if ram:
+            self.ram += int(ram)
+        if cpus:
+            self.cpus += int(cpus)
+
+    def __iadd__(self, other):
+        self.labs += other.labs
+        self.nodes += other.nodes
+        self.links += other.links
+        self.multi_access_networks += other.multi_access_networks
+        self.ram += other.ram
+        self.cpus += other.cpus
+        self.node_types.update(other.node_types)
+        self.templates.update(other.templates)
+        self.images.update(other.images)
+        return self
+
+    def to_dict(self):
+        result = {
+            'nodes': self.nodes,
+            'links': self.links,
+            'multi_access_networks': self.multi_access_networks,
+            'ram': self.ram,
+            'cpus': self.cpus,
+            'node_types': dict(self.node_types),
+            'templates': dict(self.templates),
+            'images': dict(self.images),
+        }
+        if self.path is not None:
+            result['name'] = self.name
+            result['path'] = self.path
+        else:
+            result['labs'] = self.labs
+        return result
+
+
+class ScanHandler(xml.sax.handler.ContentHandler):
+    """SAX handler which collects LabStats from a *.unl file.
+
+    Only <lab>, <node> and <interface> elements are looked at.
+    Everything inside <objects> (configs and text objects) is skipped without decoding.
+    """
+    def __init__(self, stats):
+        super().__init__()
+        self.stats = stats
+        self.objects_depth = 0
+        self.current_node_id = None
+        self.network_members = collections.Counter()
+        self.serial_links = set()
+
+    def startElement(self, name, attrs):
+        if self.objects_depth or name == 'objects':
+            self.objects_depth += 1
+        elif name == 'node':
+            self.current_node_id = attrs.get('id')
+            self.stats.add_node(node_type=attrs.get('type'),
+                                template=attrs.get('template'),
+                                image=attrs.get('image'),
+                                ram=attrs.get('ram'),
+                                cpus=attrs.get('cpu'))
+        elif name == 'interface':
+            link_type = attrs.get('type')
+            if link_type == 'ethernet':
+                self.network_members[attrs.get('network_id')] += 1
+            elif link_type == 'serial':
+                local_end = (self.current_node_id, attrs.get('id'))
+                remote_end = (attrs.get('remote_id'), attrs.get('remote_if'))
+                self.serial_links.add(frozenset((local_end, remote_end)))
+        elif name == 'lab':
+            self.stats.name = attrs.get('name')
+
+    def endElement(self, name):
+        if self.objects_depth:
+            self.objects_depth -= 1
+
+    def endDocument(self):
+        for members in self.network_members.values():
+            if members == 2:
+                self.stats.links += 1
+            elif members > 2:
+                self.stats.multi_access_networks += 1
+        self.stats.links += len(self.serial_links)
+
+
+def scan_lab(source, path=None):
+    """
+    Collects inventory stats from the source *.unl file without building Topology
+
+    Args:
+        source: file name or file object containing the source *.unl file
+        path: string, path to the source file which is put into the stats
+
+    Returns:
+        LabStats object
+    """
+    stats = LabStats(path=path if path is not None else getattr(source, 'name', source))
+    parser = xml.sax.make_parser()
+    parser.setFeature(xml.sax.handler.feature_external_ges, False)
+    parser.setContentHandler(ScanHandler(stats))
+    parser.parse(source)
+    return stats
+
+
+def build_scan_report(paths):
+    """
+    Scans all source files and aggregates their stats
+
+    Args:
+        paths: iterable of paths to *.unl files
+
+    Returns:
+        dictionary with 'total' and per-lab 'labs' stats, ready to be dumped to JSON
+    """
+    total = LabStats()
+    labs = []
+    for path in paths:
+        stats = scan_lab(path)
+        total += stats
+        labs.append(stats.to_dict())
+    return {'total': total.to_dict(), 'labs': labs}
@@ -0,0 +1,83 @@
+import argparse
+import hashlib
+
+
+SHARD_LOAD_FACTOR = 1.25
+
+
+def parse_shard(value):
+    """
+    Parses the shard specification, it is used as argparse type
+
+    Args:
+        value: string in the format K/N, where K is a shard number from 1 to N
+
+    Returns:
+        tuple (K, N)
+
+    Raises:
+        argparse.ArgumentTypeError if the value is not valid
+    """
+    try:
+        shard_number, shard_count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'shard must be in the format K/N, got {value}')
+    if not 1 <= shard_number <= shard_count:
+        raise argparse.ArgumentTypeError(f'shard number must be between 1 and {shard_count}, got {shard_number}')
+    return shard_number, shard_count
+
+
+def shard_suffix(shard):
+    """
+    Builds a file name suffix for per-shard files
+
+    Args:
+        shard: tuple (K, N) or None
+
+    Returns:
+        string, e.g. '.shard-1-of-4' or an empty string if there is no sharding
+    """
+    if shard is None:
+        return ''
+    return f'.shard-{shard[0]}-of-{shard[1]}'
+
+
+def _hash(key):
+    return int.from_bytes(hashlib.sha256(key.encode()).digest()[:8], 'big')
+
+
+def assign_shards(files, shard_count, load_factor=SHARD_LOAD_FACTOR):
+    """
+    Deterministically assigns files to shards using consistent hashing with bounded loads
+
+    Every file ranks the shards by rendezvous hash of its path and goes to the first shard
+    which stays under load_factor times the average shard size in bytes.
+    Files are visited in the order of their own hash, so the assignment of a file depends only on
+    the files with a smaller hash and the total size; adding a file moves only a few others.
+    Every host computes the same assignment from the same list of files without coordination.
+
+    Args:
+        files: iterable of (relative path, size in bytes) tuples
+        shard_count: int, number of shards
+        load_factor: float, maximum shard size relative to the average one
+
+    Returns:
+        dictionary, where key is relative path and value is the shard number from 1 to shard_count
+    """
+    files = sorted(files, key=lambda file: (_hash(file[0]), file[0]))
+    capacity = load_factor * sum(size for _, size in files) / shard_count
+    loads = [0] * shard_count
+    path_to_shard = {}
+
+    for path, size in files:
+        ranked_shards = sorted(range(shard_count), key=lambda shard: _hash(f'{path}/{shard}'), reverse=True)
+        for shard in ranked_shards:
+            if loads[shard] + size <= capacity:
+                break
+        else:
+            # the file is larger than the remaining capacity of any shard
+            shard = min(range(shard_count), key=lambda shard: loads[shard])
+        loads[shard] += size
+        path_to_shard[path] = shard + 1
+
+    return path_to_shard
@@ -0,0 +1,245 @@
+import hashlib
+import json
+import os
+
+
+SIDECAR_SUFFIX = '.eve-sync.json'
+# nodes go first, links are checked against the patched nodes
+ELEMENT_TYPES = ('nodes', 'links', 'drawings')
+ELEMENT_ID_KEYS = {'nodes': 'node_id', 'links': 'link_id', 'drawings': 'drawing_id'}
+
+
+def hash_json(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode()).hexdigest()
+
+
+def get_link_key(link):
+    """Key of the link which does not change between conversions: EVE node and interface IDs of both ends"""
+    return '|'.join(sorted(f'{interface.node.eve_node_id}:{interface.eve_id}' for interface in link.interfaces))
+
+
+def get_drawing_key(drawing, index):
+    return drawing.eve_id if drawing.eve_id is not None else f'#{index}'
+
+
+class ProjectSync(object):
+    """Writes a GNS3 project and keeps it in sync with the EVE-NG lab on later conversions.
+
+    Next to the .gns3 file a sidecar file is written, which maps EVE IDs of nodes, links and drawings
+    to GNS3 IDs and to the hash of their EVE-NG source (see hash_sources).
+    With the sidecar, an update builds JSON only for the elements whose source has changed:
+    other elements are kept exactly as they are in the existing .gns3 file, including changes made in GNS3,
+    and only added or changed configs are written. The .gns3 file itself is still rewritten as a whole.
+
+    Attributes:
+        topology (Topology): the new topology
+        lab_dir (str): directory of the GNS3 project
+        state (dict): content of the sidecar file of the previous conversion or None, loaded only for an update
+        old_project (dict): content of the existing .gns3 file or None, loaded only for an update
+    """
+    def __init__(self, topology, lab_dir):
+        self.topology = topology
+        self.lab_dir = lab_dir
+        self.project_path = os.path.join(lab_dir, f'{topology.name}.gns3')
+        self.sidecar_path = os.path.join(lab_dir, f'{topology.name}{SIDECAR_SUFFIX}')
+        self.config_dir_path = os.path.join(lab_dir, 'configs')
+        self.state = None
+        self.old_project = None
+
+    @staticmethod
+    def _load_json(path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def load(self):
+        """
+        Loads the sidecar and the .gns3 file of the previous conversion, if they exist
+
+        Modifies:
+            self.state and self.old_project
+        """
+        self.state = self._load_json(self.sidecar_path)
+        self.old_project = self._load_json(self.project_path)
+
+    @property
+    def can_patch(self):
+        return self.state is not None and self.old_project is not None
+
+    def keyed_elements(self):
+        """
+        Pairs the topology elements with their stable keys
+
+        Returns:
+            dictionary, where key is element type and value is a list of (key, object) tuples
+        """
+        return {
+            'nodes': [(node.eve_node_id, node) for node in self.topology.nodes],
+            'links': [(get_link_key(link), link) for link in self.topology.links],
+            'drawings': [(get_drawing_key(drawing, index), drawing)
+                         for index, drawing in enumerate(self.topology.text_objects)],
+        }
+
+    def restore_ids(self):
+        """
+        Reuses project, node, link and drawing IDs of the previous conversion for the matching elements
+
+        Modifies:
+            uuid attribute of Topology, Node, Link and Drawing objects
+        """
+        self.topology.uuid = self.state['project_id']
+        for element_type, elements in self.keyed_elements().items():
+            previous = self.state[element_type]
+            for key, element in elements:
+                if key in previous:
+                    element.uuid = previous[key]['id']
+
+    def hash_sources(self):
+        """
+        Hashes everything the GNS3 JSON of every element is built from, without building the JSON
+
+        A node is built from its <node> element with interfaces, its console port and compute,
+        a link from both of its nodes and a drawing from its <textobject> element.
+        Coordinates of all elements depend on the scene size and images on the options, so they are hashed too.
+
+        Returns:
+            dictionary, where key is element type and value is a key to hash mapping
+        """
+        topology = self.topology
+        options = topology.options
+        context = [topology.gns_scene_size.width, topology.gns_scene_size.height,
+                   options.console_start_port, options.l2_iol_image, options.l3_iol_image]
+        id_to_node_dict = {node_dict['@id']: node_dict
+                           for node_dict in topology.parsed_eve_xml['lab']['topology']['nodes']['node']}
+        text_object_dicts = (topology.get_objects_dict().get('textobjects') or {}).get('textobject', [])
+
+        node_hashes = {
+            node.eve_node_id: hash_json([context, id_to_node_dict.get(node.eve_node_id),
+                                         node.console_port, node.compute_id])
+            for node in topology.nodes
+        }
+        keyed_elements = self.keyed_elements()
+        return {
+            'nodes': node_hashes,
+            'links': {key: hash_json([key] + [node_hashes[interface.node.eve_node_id]
+                                              for interface in link.interfaces])
+                      for key, link in keyed_elements['links']},
+            'drawings': {key: hash_json([context, text_object_dict])
+                         for (key, _), text_object_dict in zip(keyed_elements['drawings'], text_object_dicts)},
+        }
+
+    def build_state(self, source_hashes):
+        state = {'project_id': str(self.topology.uuid), 'configs': {}}
+        for element_type, elements in self.keyed_elements().items():
+            state[element_type] = {
+                key: {'id': str(element.uuid), 'hash': source_hashes[element_type][key]}
+                for key, element in elements
+            }
+        for node in self.topology.nodes:
+            if node.config:
+                state['configs'][node.config_filename] = hashlib.sha256(node.config).hexdigest()
+        return state
+
+    def write_state(self, state):
+        with open(self.sidecar_path, 'w') as f:
+            f.write(json.dumps(state, indent=4, sort_keys=True))
+
+    def write(self, update=False):
+        """
+        Writes the project, patching the existing one if update is requested and possible
+
+        Args:
+            update: boolean, patch the existing project instead of overwriting it
+
+        Returns:
+            list of paths of all project files
+        """
+        if update:
+            # the previous project of a large lab is expensive to parse, so it is read only when it is patched
+            self.load()
+            if self.can_patch:
+                return self.patch()
+        return self.write_full()
+
+    def write_full(self):
+        result = self.topology.build_gns_topology_dict()
+        paths = self.topology.write_configs()
+        paths.append(self.topology.write_gns_topology_json(result))
+        self.write_state(self.build_state(self.hash_sources()))
+        return paths
+
+    def patch(self):
+        self.restore_ids()
+        new_state = self.build_state(self.hash_sources())
+        keyed_elements = self.keyed_elements()
+        project = self.old_project
+        changes = []
+
+        for element_type in ELEMENT_TYPES:
+            id_key = ELEMENT_ID_KEYS[element_type]
+            old_state = self.state[element_type]
+            old_elements = {element[id_key]: element for element in project['topology'].get(element_type, [])}
+            tracked_ids = {entry['id'] for entry in old_state.values()}
+            added = changed = 0
+
+            elements = []
+            for key, element in keyed_elements[element_type]:
+                old_entry = old_state.get(key)
+                if old_entry is None:
+                    added += 1
+                    elements.append(element.build_gns_topology_json())
+                elif old_entry['hash'] != new_state[element_type][key]['hash']:
+                    changed += 1
+                    elements.append(element.build_gns_topology_json())
+                elif old_entry['id'] in old_elements:
+                    # unchanged in EVE-NG, GNS3 side edits are preserved
+                    elements.append(old_elements[old_entry['id']])
+            removed = len(set(old_state) - set(new_state[element_type]))
+            # elements created in GNS3 are not tracked in the sidecar and are kept as well
+            elements.extend(element for element_id, element in old_elements.items() if element_id not in tracked_ids)
+            if element_type == 'links':
+                # a link drawn in GNS3 to a node which was removed in EVE-NG (or in GNS3) would be dangling
+                node_ids = {node['node_id'] for node in project['topology']['nodes']}
+                elements = [link for link in elements
+                            if all(link_node['node_id'] in node_ids for link_node in link['nodes'])]
+
+            project['topology'][element_type] = elements
+            changes.append(f'{element_type}: +{added} ~{changed} -{removed}')
+
+        project['topology']['computes'] = [compute.build_gns_topology_json() for compute in self.topology.computes]
+        project['name'] = self.topology.name
+        project['scene_width'] = self.topology.gns_scene_size.width
+        project['scene_height'] = self.topology.gns_scene_size.height
+
+        self.patch_configs(self.state['configs'], new_state['configs'])
+        self.topology.write_gns_topology_json(project)
+        self.write_state(new_state)
+        print(f'Updated {self.project_path} ({", ".join(changes)})')
+
+        paths = [os.path.join(self.config_dir_path, filename) for filename in sorted(new_state['configs'])]
+        paths.append(self.project_path)
+        return paths
+
+    def patch_configs(self, old_configs, new_configs):
+        """
+        Writes added and changed configs and deletes configs of removed nodes
+
+        Args:
+            old_configs: dictionary, config file name to hash mapping of the previous conversion
+            new_configs: dictionary, config file name to hash mapping of the topology
+
+        Returns:
+            None
+        """
+        os.makedirs(self.config_dir_path, exist_ok=True)
+        for node in self.topology.nodes:
+            filename = node.config_filename
+            if filename in new_configs and old_configs.get(filename) != new_configs[filename]:
+                node.write_config_to_dir(self.config_dir_path)
+        for filename in set(old_configs) - set(new_configs):
+            try:
+                os.remove(os.path.join(self.config_dir_path, filename))
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,67 @@
+import collections
+import http.server
+import threading
+
+
+class Gns3StubServer(object):
+    """Stand-in for GNS3 server which records requests and answers with scripted statuses.
+
+    Every request is answered with 201 and an empty JSON object, unless a status is scripted for its path.
+    Scripted statuses of a path are used one per request, then the default answer is used again.
+
+    Attributes:
+        url (str): base URL of the server, e.g. http://127.0.0.1:PORT
+        requests (list): (method, path, body) tuples in the order the server received them
+    """
+    def __init__(self):
+        self.requests = []
+        self.scripted_statuses = collections.defaultdict(collections.deque)
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                with stub.lock:
+                    stub.requests.append(('POST', self.path, body))
+                    statuses = stub.scripted_statuses[self.path]
+                    status = statuses.popleft() if statuses else 201
+                data = b'{}' if status < 400 else b'{"message": "scripted error"}'
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def script(self, path, *statuses):
+        """Makes the next requests to the path fail with the statuses"""
+        with self.lock:
+            self.scripted_statuses[path].extend(statuses)
+
+    def paths(self):
+        with self.lock:
+            return [path for _, path, _ in self.requests]
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,63 @@
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from batch import BatchRunner
+from tests.test_sync import LINKS, NODES, make_lab
+
+
+def get_arguments(argv):
+    """Parses the command line of eve-to-gns3-converter.py, its file name is not importable as a module"""
+    spec = importlib.util.spec_from_file_location(
+        'converter', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'eve-to-gns3-converter.py')
+    )
+    converter = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(converter)
+    with mock.patch.object(sys, 'argv', ['eve-to-gns3-converter.py'] + argv):
+        return converter.get_arguments()
+
+
+class BatchRunnerTest(unittest.TestCase):
+    def setUp(self):
+        self.src_dir = tempfile.mkdtemp()
+        self.dst_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.src_dir, 'lab.unl'), 'w') as f:
+            f.write(make_lab(NODES, LINKS))
+        os.symlink(os.path.join(self.src_dir, 'missing.unl'), os.path.join(self.src_dir, 'broken.unl'))
+
+    def tearDown(self):
+        shutil.rmtree(self.src_dir)
+        shutil.rmtree(self.dst_dir)
+
+    def run_batch(self, *argv):
+        runner = BatchRunner(get_arguments(['-s', self.src_dir, '-d', self.dst_dir] + list(argv)))
+        with contextlib.redirect_stdout(io.StringIO()):
+            return runner, runner.run()
+
+    def test_unreadable_file_is_recorded_as_failed(self):
+        runner, succeeded = self.run_batch()
+
+        self.assertFalse(succeeded)
+        self.assertEqual((runner.converted, runner.failed), (1, 1))
+        with open(runner.journal.path) as f:
+            entries = {entry['path']: entry for entry in map(json.loads, f)}
+        self.assertEqual(entries['broken.unl']['status'], 'failed')
+        self.assertEqual(entries['broken.unl']['error_type'], 'FileNotFoundError')
+        self.assertEqual(entries['lab.unl']['status'], 'ok')
+
+    def test_unreadable_file_is_sharded(self):
+        runners = [self.run_batch('--shard', f'{shard}/2')[0] for shard in (1, 2)]
+
+        self.assertEqual(sum(runner.converted for runner in runners), 1)
+        self.assertEqual(sum(runner.failed for runner in runners), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
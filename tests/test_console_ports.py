@@ -0,0 +1,83 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import exceptions
+from console_ports import ConsolePortAllocator, get_lab_key
+
+
+class ConsolePortAllocatorTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.map_path = os.path.join(self.temp_dir, 'console-ports.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_reserved_ports_are_skipped(self):
+        allocator = ConsolePortAllocator(5000, 5009, reserved=[(5001, 5003), (5005, 5005)])
+
+        ports = allocator.assign('lab', ['1', '2', '3', '4'])
+
+        self.assertEqual(ports, {'1': 5000, '2': 5004, '3': 5006, '4': 5007})
+
+    def test_ports_are_unique_across_labs(self):
+        allocator = ConsolePortAllocator(5000, 5099)
+
+        lab1_ports = allocator.assign('lab1', ['1', '2'])
+        lab2_ports = allocator.assign('lab2', ['1', '2'])
+
+        self.assertEqual(len(set(lab1_ports.values()) | set(lab2_ports.values())), 4)
+
+    def test_ports_are_reused_from_the_saved_map(self):
+        allocator = ConsolePortAllocator(5000, 5099)
+        allocator.assign('lab1', ['1', '2'])
+        lab2_ports = allocator.assign('lab2', ['1', '2'])
+        allocator.save(self.map_path)
+
+        # lab1 is converted first in the next run, it must not take the ports of lab2
+        allocator = ConsolePortAllocator.load(self.map_path, 5000, 5099)
+        allocator.assign('lab1', ['1', '2', '3'])
+
+        self.assertEqual(allocator.assign('lab2', ['1', '2']), lab2_ports)
+
+    def test_saved_ports_which_became_reserved_are_allocated_again(self):
+        allocator = ConsolePortAllocator(5000, 5099)
+        allocator.assign('lab', ['1', '2'])
+        allocator.save(self.map_path)
+
+        allocator = ConsolePortAllocator.load(self.map_path, 5000, 5099, reserved=[(5000, 5000)])
+
+        self.assertEqual(allocator.assign('lab', ['1', '2']), {'1': 5002, '2': 5001})
+
+    def test_ports_of_removed_nodes_are_released(self):
+        allocator = ConsolePortAllocator(5000, 5002)
+        allocator.assign('lab1', ['1', '2', '3'])
+
+        allocator.assign('lab1', ['1'])
+
+        self.assertEqual(allocator.assign('lab2', ['1', '2']), {'1': 5001, '2': 5002})
+
+    def test_exhausted_allocation_is_rolled_back(self):
+        allocator = ConsolePortAllocator(5000, 5004)
+        lab1_ports = allocator.assign('lab1', ['1', '2', '3'])
+
+        # lab1 drops node 3 and gets 3 new nodes, but only 2 ports are free after the release of node 3
+        with self.assertRaises(exceptions.ConsolePortsExhausted):
+            allocator.assign('lab1', ['1', '2', '4', '5', '6', '7'])
+
+        self.assertEqual(allocator.labs['lab1'], lab1_ports)
+        self.assertEqual(allocator.assign('lab2', ['1', '2']), {'1': 5003, '2': 5004})
+
+    def test_lab_key_does_not_depend_on_the_mode(self):
+        path = os.path.join(self.temp_dir, 'labs', 'lab.unl')
+        os.makedirs(os.path.dirname(path))
+        open(path, 'w').close()
+        relative_path = os.path.relpath(path)
+
+        self.assertEqual(get_lab_key(path), get_lab_key(relative_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
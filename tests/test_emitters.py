@@ -0,0 +1,37 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from emitters import get_emitter
+from options import ConversionOptions
+from tests.test_sync import CONFIGS, LINKS, NODES, make_lab
+from topology import Topology
+
+
+class EmitterTest(unittest.TestCase):
+    def setUp(self):
+        self.dst_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dst_dir)
+
+    def test_shared_configs_keep_dedup_hardlinks(self):
+        options = ConversionOptions(config_store_dir=os.path.join(self.dst_dir, '.config-store'))
+        topology = Topology(make_lab(NODES, LINKS, CONFIGS), options, self.dst_dir)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            gns3_paths = get_emitter('gns3').write(topology, self.dst_dir)
+            containerlab_paths = get_emitter('containerlab').write(topology, self.dst_dir)
+
+        config_path = os.path.join(self.dst_dir, 'Sync', 'configs', 'R1_startup-config.cfg')
+        self.assertIn(config_path, gns3_paths)
+        self.assertIn(config_path, containerlab_paths)
+        # the project file is a hardlink of the stored config, it was not rewritten by the containerlab emitter
+        self.assertEqual(os.stat(config_path).st_nlink, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+
+from gns3_api import Gns3ApiError, Gns3Client
+from tests.gns3_stub_server import Gns3StubServer
+from topology import Topology
+
+
+LAB_XML = '''<?xml version="1.0" encoding="UTF-8"?>
+<lab name="Push" version="1"><topology><nodes>
+<node id="1" name="R1" type="iol" template="iol" image="L3.bin" ethernet="1" serial="0" icon="Router.png" left="10" top="12">
+<interface id="0" name="e0/0" type="ethernet" network_id="1"/></node>
+<node id="2" name="R2" type="iol" template="iol" image="L3.bin" ethernet="1" serial="0" icon="Router.png" left="90" top="12">
+<interface id="0" name="e0/0" type="ethernet" network_id="1"/></node>
+</nodes><networks><network id="1" type="bridge" name="R1-R2"/></networks></topology>
+<objects><textobjects><textobject id="1"><data>PGRpdiBzdHlsZT0ibGVmdDogMTBweDsgdG9wOiA1cHg7Ij5hPC9kaXY+</data></textobject></textobjects>
+<configs><config id="1">aG9zdG5hbWUgUjEK</config></configs></objects></lab>'''
+
+STAGES = ('project', 'nodes', 'configs', 'links', 'drawings', 'close')
+
+
+def get_stage(path):
+    if path == '/v2/projects':
+        return 'project'
+    if '/files/' in path:
+        return 'configs'
+    return path.rsplit('/', 1)[-1]
+
+
+class PushTopologyTest(unittest.TestCase):
+    def setUp(self):
+        self.topology = Topology(LAB_XML)
+        self.project_path = f'/v2/projects/{self.topology.uuid}'
+        self.server = Gns3StubServer().start()
+        self.client = Gns3Client(self.server.url, concurrency=4, retries=2, timeout=5, backoff=0)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+
+    def test_stages_are_sent_in_order(self):
+        timings = self.client.push_topology(self.topology)
+
+        stages = [get_stage(path) for path in self.server.paths()]
+        self.assertEqual(stages, sorted(stages, key=STAGES.index))
+        self.assertEqual(stages, ['project', 'nodes', 'nodes', 'configs', 'links', 'drawings', 'close'])
+        self.assertEqual(timings['requests'], len(stages))
+        self.assertEqual(set(STAGES) - set(timings), set())
+
+    def test_retries_on_503(self):
+        self.server.script(f'{self.project_path}/links', 503, 503)
+
+        timings = self.client.push_topology(self.topology)
+
+        self.assertEqual(self.server.paths().count(f'{self.project_path}/links'), 3)
+        self.assertEqual(self.client.retried, 2)
+        self.assertEqual(timings['requests'], 9)
+
+    def test_gives_up_after_retries(self):
+        self.server.script(f'{self.project_path}/links', 503, 503, 503)
+
+        with self.assertRaises(Gns3ApiError) as context:
+            self.client.push_topology(self.topology)
+
+        self.assertEqual(context.exception.status, 503)
+        self.assertNotIn(f'{self.project_path}/drawings', self.server.paths())
+
+    def test_409_after_retry_is_success(self):
+        # the first attempt created the project, but its response was lost
+        self.server.script('/v2/projects', 503, 409)
+
+        self.client.push_topology(self.topology)
+
+        self.assertEqual(self.server.paths().count('/v2/projects'), 2)
+        self.assertEqual(get_stage(self.server.paths()[-1]), 'close')
+
+    def test_409_without_retry_is_error(self):
+        self.server.script('/v2/projects', 409)
+
+        with self.assertRaises(Gns3ApiError) as context:
+            self.client.push_topology(self.topology)
+
+        self.assertEqual(context.exception.status, 409)
+        self.assertEqual(self.server.paths(), ['/v2/projects'])
+
+
+if __name__ == '__main__':
+    unittest.main()
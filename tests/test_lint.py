@@ -0,0 +1,57 @@
+import unittest
+
+from lint import ERROR, lint_lab
+from topology import Topology
+
+
+LAB_TEMPLATE = '''<?xml version="1.0" encoding="UTF-8"?>
+<lab name="Lint" version="1"><topology>{nodes}
+<networks><network id="1" type="bridge" name="R1-R2"/></networks></topology></lab>'''
+
+NODES = '''<nodes>
+<node id="1" name="R1" type="iol" template="iol" image="L3.bin" ethernet="1" serial="1" icon="Router.png" left="{left}" top="12">
+<interface id="0" name="e0/0" type="ethernet" network_id="1"/>
+<interface id="16" name="s1/0" type="serial" remote_id="2" remote_if="{remote_if}"/></node>
+<node id="2" name="R2" type="iol" template="iol" image="L3.bin" ethernet="1" serial="1" icon="Router.png" left="90" top="12">
+<interface id="0" name="e0/0" type="ethernet" network_id="1"/>
+<interface id="16" name="s1/0" type="serial" remote_id="1" remote_if="16"/></node>
+<node id="3" name="V3" type="qemu" template="vios" image="vios" console="telnet" cpu="{cpu}" ram="1024" ethernet="4" icon="Router.png" left="50%" top="50">
+</node>
+</nodes>'''
+
+
+def make_lab(nodes=None, left='10', remote_if='16', cpu='1'):
+    if nodes is None:
+        nodes = NODES.format(left=left, remote_if=remote_if, cpu=cpu)
+    return LAB_TEMPLATE.format(nodes=nodes)
+
+
+class LintTest(unittest.TestCase):
+    def assert_error(self, lab, code):
+        """Checks that lint reports the error and that the conversion indeed fails"""
+        errors = [issue.code for issue in lint_lab(lab) if issue.severity == ERROR]
+        self.assertIn(code, errors)
+        with self.assertRaises(Exception):
+            Topology(lab).build_gns_topology_dict()
+
+    def test_valid_lab(self):
+        lab = make_lab()
+
+        self.assertEqual([issue for issue in lint_lab(lab) if issue.severity == ERROR], [])
+        Topology(lab).build_gns_topology_dict()
+
+    def test_serial_link_to_missing_remote_interface(self):
+        self.assert_error(make_lab(remote_if='17'), 'unknown-remote-interface')
+
+    def test_empty_nodes(self):
+        self.assert_error(make_lab(nodes='<nodes/>'), 'no-nodes')
+
+    def test_non_integer_position(self):
+        self.assert_error(make_lab(left='10.5'), 'invalid-attribute')
+
+    def test_non_integer_qemu_attribute(self):
+        self.assert_error(make_lab(cpu='two'), 'invalid-attribute')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+import exceptions
+from placement import Compute, Placement
+
+
+class FakeNode(object):
+    node_type = 'qemu'
+
+    def __init__(self, name, cpus, ram=1024):
+        self.name = name
+        self.cpus = cpus
+        self.ram = ram
+
+
+class FakeLink(object):
+    def __init__(self, node1, node2):
+        self.node1 = node1
+        self.node2 = node2
+
+
+class PlacementTest(unittest.TestCase):
+    def test_nodes_are_balanced_and_connected_nodes_stay_together(self):
+        nodes = [FakeNode(f'R{i}', 2) for i in range(8)]
+        # two chains of four nodes
+        links = [FakeLink(nodes[i], nodes[i + 1]) for i in (0, 1, 2, 4, 5, 6)]
+        placement = Placement(nodes, links, [Compute('a', 8, 65536), Compute('b', 8, 65536)])
+
+        node_to_compute = placement.run()
+
+        self.assertEqual(placement.cut_size, 0)
+        self.assertEqual(sorted(compute.compute_id for compute in node_to_compute.values()), ['a'] * 4 + ['b'] * 4)
+
+    def test_total_capacity_exceeded(self):
+        with self.assertRaises(exceptions.InsufficientComputeCapacity):
+            Placement([FakeNode('R1', 8)], [], [Compute('a', 4, 65536)])
+
+    def test_node_does_not_fit_on_any_compute(self):
+        # 12 CPUs are needed and available in total, but only one 4 CPU node fits on a 6 CPU compute
+        nodes = [FakeNode(f'R{i}', 4) for i in range(3)]
+        placement = Placement(nodes, [], [Compute('a', 6, 65536), Compute('b', 6, 65536)])
+
+        with self.assertRaises(exceptions.InsufficientComputeCapacity):
+            placement.run()
+
+    def test_no_compute_is_filled_past_its_capacity(self):
+        nodes = [FakeNode('R0', 4), FakeNode('R1', 4), FakeNode('R2', 2), FakeNode('R3', 2)]
+        links = [FakeLink(nodes[0], node) for node in nodes[1:]]
+        placement = Placement(nodes, links, [Compute('a', 6, 65536), Compute('b', 6, 65536)])
+
+        placement.run()
+
+        for compute_index in range(len(placement.computes)):
+            self.assertLessEqual(placement.utilization(compute_index), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
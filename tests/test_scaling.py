@@ -0,0 +1,37 @@
+import unittest
+
+from scaling_guard import STAGES, check_stage, fit_exponent, measure_scaling
+
+
+SIZES = [200, 1000, 4000]
+# the same limit as the default of scaling_guard.py, roughly n log n with some noise margin
+MAX_EXPONENT = 1.3
+
+
+class FitExponentTest(unittest.TestCase):
+    def test_exponent_of_power_law(self):
+        self.assertAlmostEqual(fit_exponent([10, 100, 1000], [5, 500, 50000]), 2)
+        self.assertAlmostEqual(fit_exponent([10, 100, 1000], [3, 30, 300]), 1)
+
+
+class ScalingTest(unittest.TestCase):
+    """Smaller version of python3 scaling_guard.py, fails if any conversion stage grows faster than the limit"""
+    @classmethod
+    def setUpClass(cls):
+        cls.timings, cls.allocations = measure_scaling(SIZES)
+
+    def test_all_stages_are_profiled(self):
+        for stage in STAGES:
+            self.assertEqual(len(self.timings[stage]), len(SIZES), stage)
+            self.assertGreater(self.timings[stage][-1], 0, stage)
+
+    def test_stages_grow_at_most_n_log_n(self):
+        for stage in STAGES:
+            time_exponent, memory_exponent, verdicts = check_stage(SIZES, self.timings[stage],
+                                                                   self.allocations[stage], MAX_EXPONENT)
+            self.assertEqual(verdicts, [], f'{stage} grows faster than n^{MAX_EXPONENT}: '
+                                           f'time n^{time_exponent:.2f}, memory n^{memory_exponent:.2f}')
+
+
+if __name__ == '__main__':
+    unittest.main()
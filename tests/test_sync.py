@@ -0,0 +1,174 @@
+import base64
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from emitters import get_emitter
+from options import ConversionOptions
+from sync import ProjectSync
+from topology import Topology
+
+
+def make_lab(nodes, links, configs=None, text='note'):
+    """
+    Builds a *.unl lab of IOL nodes
+
+    Args:
+        nodes: list of (EVE node ID, name, left) tuples
+        links: list of (node ID, interface ID, node ID, interface ID) tuples, every link is a network
+        configs: dictionary, node ID to config text mapping
+        text: text of the only text object
+    """
+    interfaces = {node_id: [] for node_id, _, _ in nodes}
+    networks = []
+    for network_id, (node1_id, interface1_id, node2_id, interface2_id) in enumerate(links, start=1):
+        networks.append(f'<network id="{network_id}" type="bridge" name="net{network_id}"/>')
+        for node_id, interface_id in ((node1_id, interface1_id), (node2_id, interface2_id)):
+            interfaces[node_id].append(f'<interface id="{interface_id}" name="e0/{interface_id}" type="ethernet" '
+                                       f'network_id="{network_id}"/>')
+    node_elements = [
+        f'<node id="{node_id}" name="{name}" type="iol" template="iol" image="L3.bin" ethernet="1" serial="0" '
+        f'icon="Router.png" left="{left}" top="100">{"".join(interfaces[node_id])}</node>'
+        for node_id, name, left in nodes
+    ]
+    config_elements = [f'<config id="{node_id}">{base64.b64encode(config.encode()).decode()}</config>'
+                       for node_id, config in (configs or {}).items()]
+    html = base64.b64encode(f'<div style="left: 10px; top: 5px;">{text}</div>'.encode()).decode()
+    return (f'<?xml version="1.0" encoding="UTF-8"?><lab name="Sync" version="1"><topology>'
+            f'<nodes>{"".join(node_elements)}</nodes><networks>{"".join(networks)}</networks></topology>'
+            f'<objects><textobjects><textobject id="1"><data>{html}</data></textobject></textobjects>'
+            f'<configs>{"".join(config_elements)}</configs></objects></lab>')
+
+
+NODES = [('1', 'R1', 100), ('2', 'R2', 200), ('3', 'R3', 300)]
+LINKS = [('1', 1, '2', 1), ('2', 2, '3', 1)]
+CONFIGS = {'1': 'hostname R1\n', '3': 'hostname R3\n'}
+
+
+class ProjectSyncTest(unittest.TestCase):
+    def setUp(self):
+        self.dst_dir = tempfile.mkdtemp()
+        self.lab_dir = os.path.join(self.dst_dir, 'Sync')
+        self.project_path = os.path.join(self.lab_dir, 'Sync.gns3')
+        self.configs_dir = os.path.join(self.lab_dir, 'configs')
+
+    def tearDown(self):
+        shutil.rmtree(self.dst_dir)
+
+    def convert(self, lab, update=True):
+        """Converts the lab and returns the printed report of the update"""
+        topology = Topology(lab, ConversionOptions(update=update), self.dst_dir)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            get_emitter('gns3').write(topology, self.dst_dir)
+        return output.getvalue()
+
+    def load_project(self):
+        with open(self.project_path) as f:
+            return json.load(f)
+
+    def save_project(self, project):
+        with open(self.project_path, 'w') as f:
+            json.dump(project, f)
+
+    def get_node_ids(self, project):
+        return {node['name']: node['node_id'] for node in project['topology']['nodes']}
+
+    def test_unchanged_lab_keeps_the_project(self):
+        self.convert(make_lab(NODES, LINKS, CONFIGS), update=False)
+        with open(self.project_path) as f:
+            content = f.read()
+
+        report = self.convert(make_lab(NODES, LINKS, CONFIGS))
+
+        self.assertIn('nodes: +0 ~0 -0, links: +0 ~0 -0, drawings: +0 ~0 -0', report)
+        with open(self.project_path) as f:
+            self.assertEqual(f.read(), content)
+
+    def test_added_changed_and_removed_elements(self):
+        self.convert(make_lab(NODES, LINKS, CONFIGS), update=False)
+        node_ids = self.get_node_ids(self.load_project())
+
+        # R2 is moved, R3 with its link and config is removed, R4 is added and connected to a new interface of R1
+        nodes = [('1', 'R1', 100), ('2', 'R2', 250), ('4', 'R4', 400)]
+        links = [('1', 1, '2', 1), ('1', 2, '4', 1)]
+        report = self.convert(make_lab(nodes, links, {'1': 'hostname R1\n'}, text='changed'))
+
+        self.assertIn('nodes: +1 ~2 -1, links: +1 ~1 -1, drawings: +0 ~1 -0', report)
+        project = self.load_project()
+        new_node_ids = self.get_node_ids(project)
+        self.assertEqual(sorted(new_node_ids), ['R1', 'R2', 'R4'])
+        self.assertEqual(new_node_ids['R1'], node_ids['R1'])
+        self.assertEqual(new_node_ids['R2'], node_ids['R2'])
+        self.assertEqual(len(project['topology']['links']), 2)
+        self.assertIn('changed', project['topology']['drawings'][0]['svg'])
+        self.assertEqual(os.listdir(self.configs_dir), ['R1_startup-config.cfg'])
+
+    def test_gns3_edits_are_preserved(self):
+        self.convert(make_lab(NODES, LINKS, CONFIGS), update=False)
+        project = self.load_project()
+        r1 = next(node for node in project['topology']['nodes'] if node['name'] == 'R1')
+        r1['x'] += 1000
+        # a node and a link created in GNS3, not known to EVE-NG
+        gns3_node = dict(r1, node_id='gns3-node', name='GNS3', x=0)
+        project['topology']['nodes'].append(gns3_node)
+        gns3_link = {'link_id': 'gns3-link', 'nodes': [{'node_id': 'gns3-node'}, {'node_id': r1['node_id']}]}
+        project['topology']['links'].append(gns3_link)
+        self.save_project(project)
+
+        self.convert(make_lab(NODES, LINKS, CONFIGS))
+
+        project = self.load_project()
+        nodes = {node['name']: node for node in project['topology']['nodes']}
+        self.assertEqual(nodes['R1']['x'], r1['x'])
+        self.assertIn('GNS3', nodes)
+        self.assertIn('gns3-link', [link['link_id'] for link in project['topology']['links']])
+
+    def test_gns3_link_to_removed_node_is_dropped(self):
+        self.convert(make_lab(NODES, LINKS, CONFIGS), update=False)
+        project = self.load_project()
+        node_ids = self.get_node_ids(project)
+        project['topology']['links'].append(
+            {'link_id': 'gns3-link', 'nodes': [{'node_id': node_ids['R1']}, {'node_id': node_ids['R3']}]}
+        )
+        self.save_project(project)
+
+        self.convert(make_lab(NODES[:2], LINKS[:1], {'1': 'hostname R1\n'}))
+
+        project = self.load_project()
+        node_ids = set(self.get_node_ids(project).values())
+        self.assertNotIn('gns3-link', [link['link_id'] for link in project['topology']['links']])
+        for link in project['topology']['links']:
+            for link_node in link['nodes']:
+                self.assertIn(link_node['node_id'], node_ids)
+
+    def test_configs_are_patched(self):
+        self.convert(make_lab(NODES, LINKS, CONFIGS), update=False)
+        r1_config_path = os.path.join(self.configs_dir, 'R1_startup-config.cfg')
+        r1_mtime = os.stat(r1_config_path).st_mtime_ns
+        os.utime(r1_config_path, ns=(r1_mtime - 10 ** 9, r1_mtime - 10 ** 9))
+
+        self.convert(make_lab(NODES, LINKS, {'1': 'hostname R1\n', '2': 'hostname R2\n'}))
+
+        self.assertEqual(sorted(os.listdir(self.configs_dir)), ['R1_startup-config.cfg', 'R2_startup-config.cfg'])
+        # the unchanged config is not rewritten
+        self.assertEqual(os.stat(r1_config_path).st_mtime_ns, r1_mtime - 10 ** 9)
+
+    def test_previous_project_is_not_read_without_update(self):
+        self.convert(make_lab(NODES, LINKS, CONFIGS), update=False)
+        topology = Topology(make_lab(NODES, LINKS, CONFIGS), ConversionOptions(), self.dst_dir)
+        project_sync = ProjectSync(topology, self.lab_dir)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            project_sync.write(update=False)
+
+        self.assertIsNone(project_sync.old_project)
+        self.assertIsNone(project_sync.state)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,43 +10,71 @@ import xmltodict
 
 import json_templates
 from node import Node
-from drawing import Drawing
+from drawing import Drawing, parse_eve_html
 from connections import Network
-from helper import Size
+from model import build_lab_model
+from config_store import ConfigStore
+from options import ConversionOptions
+from parallel import ordered_map
+from placement import Placement
+from helper import Point, Size
+
+
+# elements which may occur once or several times are always parsed as lists, lint.py reads the same structure
+XML_FORCE_LIST = ('node', 'network', 'interface', 'objects', 'config', 'textobject')
+
+
+def _parse_text_object(_, data):
+    return parse_eve_html(base64.b64decode(data))
+
+
+def _build_element_json(elements, index):
+    return elements[index].build_gns_topology_json()
 
 
 class Topology(object):
     """The class which represents a topology with nodes and links.
 
+    Topology does not use any global state, so different topologies can be converted concurrently in threads.
+    Nothing is written to disk unless one of the write methods is called.
+
     Attributes:
         GNS_SCENE_SCALE (int): constant, scale factor when translating coordinates from EVE to GNS3
         uuid (uuid
+        options (ConversionOptions): options of the conversion
     """
     GNS_SCENE_SCALE = 1
     GNS_SCENE_OFFSET = 200
     GNS_DEFAULT_SCENE_SIZE = Size(2000, 1000)
 
-    def __init__(self, eve_xml, args, dst_dir='/dst'):
+    def __init__(self, eve_xml, options=None, dst_dir=None):
         self.uuid = uuid.uuid4()
         self.eve_xml = eve_xml
-        self.args = args
-        self.console_start_port = args.console_start_port
+        self.options = options if options is not None else ConversionOptions()
+        self.console_start_port = self.options.console_start_port
         self.gns_scene_size = None
         self.dst_dir = dst_dir
+        self.config_store = None
+        if self.options.config_store_dir is not None:
+            self.config_store = ConfigStore(self.options.config_store_dir)
 
-        self.parsed_eve_xml = xmltodict.parse(eve_xml, force_list={'network', 'interface'})
+        self.parsed_eve_xml = xmltodict.parse(eve_xml, force_list=XML_FORCE_LIST)
         self.name = self.parsed_eve_xml['lab']['@name']
 
         self.links = []
         self.text_objects = []
         self.id_to_network = {}
         self.id_to_node = {}
+        self.computes = []
+        self.placement = None
+        self._model = None
 
         self.parse_xml()
 
         self.calculate_gns_canvas_size()
 
-        self.create_links_from_networks()
+        if self.options.computes:
+            self.place_nodes(list(self.options.computes))
 
     @property
     def nodes(self):
@@ -56,6 +84,13 @@ class Topology(object):
     def networks(self):
         return self.id_to_network.values()
 
+    @property
+    def model(self):
+        """Frozen LabModel of the parsed topology, built on the first access and shared by all emitters"""
+        if self._model is None:
+            self._model = build_lab_model(self)
+        return self._model
+
     def parse_networks(self):
         """
         TODO:
@@ -87,6 +122,16 @@ class Topology(object):
         for node_dict in nodes_dict:
             Node.from_dict(node_dict, topology=self, )
 
+    def get_objects_dict(self):
+        """
+        Gets the first <objects> element, which contains configs and text objects
+
+        Returns:
+            dictionary, empty if the lab has no objects
+        """
+        objects_dicts = self.parsed_eve_xml['lab'].get('objects')
+        return (objects_dicts[0] if objects_dicts else None) or {}
+
     def parse_configs(self):
         """
         TODO:
@@ -99,14 +144,13 @@ class Topology(object):
         Modifies:
             Node objects - added config attribute
         """
-        configs_dict = self.parsed_eve_xml['lab'].get('objects')
-        if configs_dict is not None:
-            for config_dict in configs_dict[0]['configs']['config']:
-                eve_node_id = config_dict['@id']
-                config = base64.b64decode(config_dict['#text'])
-                node = self.id_to_node[eve_node_id]
+        config_dicts = (self.get_objects_dict().get('configs') or {}).get('config', [])
+        for config_dict in config_dicts:
+            eve_node_id = config_dict['@id']
+            config = base64.b64decode(config_dict.get('#text', ''))
+            node = self.id_to_node[eve_node_id]
 
-                node.config = config
+            node.config = config
 
     def parse_text_objects(self):
         """
@@ -114,11 +158,14 @@ class Topology(object):
         Returns:
 
         """
-        text_objects_dict = self.parsed_eve_xml['lab'].get('objects')
-        if text_objects_dict is not None:
-            for text_object_dict in text_objects_dict[0]['textobjects']['textobject']:
-                eve_html = base64.b64decode(text_object_dict['data'])
-                self.text_objects.append(Drawing(eve_html=eve_html, topology=self))
+        text_object_dicts = (self.get_objects_dict().get('textobjects') or {}).get('textobject', [])
+        # HTML parsing with BeautifulSoup is much more expensive than sending the data to a worker
+        parsed_text_objects = ordered_map(_parse_text_object,
+                                          [text_object_dict['data'] for text_object_dict in text_object_dicts],
+                                          self.options.workers)
+        for text_object_dict, (eve_x, eve_y, text) in zip(text_object_dicts, parsed_text_objects):
+            self.text_objects.append(Drawing(Point(eve_x, eve_y), text, topology=self,
+                                             eve_id=text_object_dict.get('@id')))
 
     def parse_xml(self):
         self.parse_networks()
@@ -128,6 +175,12 @@ class Topology(object):
         self.create_links_from_networks()
 
     def write_configs(self):
+        """
+        Writes startup configs of all nodes into the configs directory of the project
+
+        Returns:
+            list of paths to the written files
+        """
         config_dir_path = os.path.join(self.dst_dir, self.name, 'configs')
 
         # deleting configs directory if exists, and creating an empty one
@@ -137,8 +190,12 @@ class Topology(object):
             pass
         os.makedirs(config_dir_path)
 
+        paths = []
         for node in self.nodes:
-            node.write_config_to_dir(config_dir_path)
+            path = node.write_config_to_dir(config_dir_path)
+            if path is not None:
+                paths.append(path)
+        return paths
 
     def calculate_gns_canvas_size(self):
         """
@@ -162,30 +219,87 @@ class Topology(object):
     def get_gns_coordinates(self, eve_coordinates):
         return round(eve_coordinates) * self.GNS_SCENE_SCALE - self.gns_scene_size // 2
 
+    def place_nodes(self, computes):
+        """
+        Assigns every node to one of the compute hosts, see placement.Placement
+
+        Args:
+            computes: list of Compute objects
+
+        Raises:
+            exceptions.InsufficientComputeCapacity if the lab does not fit on the computes
+
+        Modifies:
+            Node objects - compute_id attribute
+            self.computes - list of computes used in the topology file
+            self.placement - Placement object, which can report the utilization of computes
+        """
+        placement = Placement(self.nodes, self.links, computes)
+        for node, compute in placement.run().items():
+            node.compute_id = compute.compute_id
+        self.computes = computes
+        self.placement = placement
+
+    def set_console_ports(self, ports):
+        """
+        Sets console ports allocated outside of the topology, e.g. by console_ports.ConsolePortAllocator
+
+        Args:
+            ports: dictionary, EVE node ID to port mapping
+
+        Modifies:
+            Node objects - console_port attribute
+        """
+        for eve_node_id, port in ports.items():
+            self.id_to_node[eve_node_id].console_port = port
+
     def create_links_from_networks(self):
         for network in self.networks:
             network.convert_to_links()
 
-    def build_gns_topology_json(self):
+    def build_gns_topology_dict(self):
         result = copy.deepcopy(json_templates.GENERAL_INFO_JSON_TEMPLATE)
-        result['topology'] = {'computes': []}
-        result['topology']['links'] = [link.build_gns_topology_json() for link in self.links]
-        result['topology']['nodes'] = [node.build_gns_topology_json() for node in self.nodes]
-        result['topology']['drawings'] = [drawing.build_gns_topology_json() for drawing in self.text_objects]
+        result['topology'] = {'computes': [compute.build_gns_topology_json() for compute in self.computes]}
+
+        # links, nodes and drawings are independent, with several workers they are built in one forked pool
+        elements = self.links + list(self.nodes) + self.text_objects
+        elements_json = ordered_map(_build_element_json, range(len(elements)), self.options.workers, elements)
+        nodes_start = len(self.links)
+        drawings_start = nodes_start + len(self.id_to_node)
+        result['topology']['links'] = elements_json[:nodes_start]
+        result['topology']['nodes'] = elements_json[nodes_start:drawings_start]
+        result['topology']['drawings'] = elements_json[drawings_start:]
 
         result['project_id'] = str(self.uuid)
         result['name'] = self.name
         result['scene_width'] = self.gns_scene_size.width
         result['scene_height'] = self.gns_scene_size.height
 
-        return json.dumps(result, indent=4, sort_keys=True)
+        return result
+
+    def build_gns_topology_json(self):
+        return json.dumps(self.build_gns_topology_dict(), indent=4, sort_keys=True)
+
+    @property
+    def gns_topology_file_path(self):
+        return os.path.join(self.dst_dir, self.name, f'{self.name}.gns3')
 
-    def write_gns_topology_json(self):
-        result = self.build_gns_topology_json()
-        gns_topology_filename = f'{self.name}.gns3'
-        gns_topology_file_path = os.path.join(self.dst_dir, self.name, gns_topology_filename)
+    def write_gns_topology_json(self, result=None):
+        """
+        Writes GNS3 topology file
+
+        Args:
+            result: dictionary from build_gns_topology_dict, it is built if not specified
+
+        Returns:
+            string, path to the written file
+        """
+        if result is None:
+            result = self.build_gns_topology_dict()
+        gns_topology_file_path = self.gns_topology_file_path
 
         with open(gns_topology_file_path, 'w') as f:
-            f.write(result)
+            f.write(json.dumps(result, indent=4, sort_keys=True))
 
         print(f'Successfully written topology file at {gns_topology_file_path}')
+        return gns_topology_file_path